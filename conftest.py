@@ -0,0 +1,8 @@
+"""
+Shared pytest setup for the root-level test modules.
+Mock environment defaults are applied once, at conftest import, so they are in
+place before any test module imports the Supabase-backed connector.
+"""
+from _mock_env import apply_mock_env
+
+apply_mock_env()
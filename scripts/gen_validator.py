@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Generate a specialized LangGraph validator from tests/validate_langgraph.py.
+
+The required state fields, graph nodes and tools are fixed, so the checks for
+them can be written out ahead of time as flat membership tests against
+src.agent, with no introspection or loops at validation time.
+
+- default: writes tests/_validate_langgraph_generated.py
+- --check: exits non-zero if the generated module is out of date
+
+Run `python tests/validate_langgraph.py --generated` to use the output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import sys
+from typing import Iterable, List
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VALIDATOR_PATH = os.path.join(REPO_ROOT, "tests", "validate_langgraph.py")
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "tests", "_validate_langgraph_generated.py")
+
+
+def load_validator():
+    spec = importlib.util.spec_from_file_location("validate_langgraph", VALIDATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def emit_checks(target: str, names: Iterable[str], label: str) -> List[str]:
+    lines = []
+    for name in sorted(names):
+        lines.append(f"    if {name!r} not in {target}:")
+        lines.append(f"        failed.append({f'{label} {name!r}'!r})")
+    return lines
+
+
+def render(validator) -> str:
+    fields = validator._REQUIRED_FIELDS
+    nodes = validator._REQUIRED_NODES
+    tools = validator._REQUIRED_TOOLS
+    lines = [
+        '"""',
+        "Flat LangGraph checks generated by scripts/gen_validator.py from tests/validate_langgraph.py.",
+        "Do not edit; regenerate after changing the required fields, nodes or tools.",
+        '"""',
+        "",
+        "from src.agent import AgentState, TOOLS, graph",
+        "",
+        f"CHECK_COUNT = {len(fields) + len(nodes) + len(tools)}",
+        "",
+        "def run_checks():",
+        '    """Return a description of every failed check."""',
+        "    failed = []",
+        "    annotations = AgentState.__annotations__",
+        "    nodes = graph.nodes",
+    ]
+    lines += emit_checks("annotations", fields, "AgentState field")
+    lines += emit_checks("nodes", nodes, "graph node")
+    lines += emit_checks("TOOLS", tools, "tool mapping")
+    lines.append("    return failed")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Generate the specialized LangGraph validator")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Path of the generated module")
+    parser.add_argument("--check", action="store_true", help="Only check that the generated module is up to date")
+    args = parser.parse_args(argv)
+
+    source = render(load_validator())
+
+    if args.check:
+        try:
+            with open(args.output, "r", encoding="utf-8") as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != source:
+            print(f"{args.output} is out of date; run scripts/gen_validator.py")
+            return 1
+        print(f"{args.output} is up to date")
+        return 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -26,6 +26,7 @@ from src.tools.rag_engine import RAGEngine
 from src.tools.notification_tool import NotificationTool
 from src.db.supabase_connector import SupabaseConnector
 from src.prompts.system_prompt import SYSTEM_PROMPT, DAILY_PLANNING_PROMPT, TASK_REPRIORITIZATION_PROMPT
+from src.json_codec import loads as _jloads
 
 # Configure logging
 logging.basicConfig(
@@ -382,7 +383,7 @@ def should_continue(state: AgentState) -> Literal["continue", "end"]:
     
     # Check if we've been searching too much
     recent_actions = state.get("recent_actions", [])
-    search_count = sum(1 for action in recent_actions if action == "search_tasks")
+    search_count = recent_actions.count("search_tasks")
     if search_count >= 3:
         logger.warning("Agent ending due to excessive search operations")
         return "end"
@@ -574,7 +575,7 @@ def reasoning(state: AgentState) -> AgentState:
             if json_start != -1 and json_end > json_start:
                 json_str = response_text[json_start:json_end]
                 logger.info(f"Attempting to parse JSON: {json_str}")
-                parsed_response = json.loads(json_str)
+                parsed_response = _jloads(json_str)
                 
                 # Extract action details
                 action = parsed_response.get('action', {})
@@ -654,7 +655,7 @@ def reasoning(state: AgentState) -> AgentState:
                 if state["goal"] == "daily_planning":
                     # Check if we've already searched recently to prevent loops
                     recent_actions = state.get("recent_actions", [])
-                    search_count = sum(1 for action in recent_actions if action == "search_tasks")
+                    search_count = recent_actions.count("search_tasks")
                     
                     if search_count >= 2:
                         # We've searched enough, check if we have tasks with proper IDs
@@ -4,10 +4,12 @@ Handles user isolation, context management, and user-specific operations.
 """
 import os
 import json
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from contextvars import ContextVar
+from contextlib import contextmanager
 from functools import wraps
 
 from sqlalchemy import create_engine, text
@@ -19,7 +21,7 @@ from dotenv import load_dotenv
 from .multi_tenant_schema import (
     Base, User, UserConfig, AgentState, UsageLog,
     UserCreate, UserResponse, UserConfigCreate, UserConfigResponse,
-    UsageLogResponse, SubscriptionTier
+    UsageLogResponse, SubscriptionTier, TIER_LIMITS
 )
 
 # Load environment variables
@@ -64,6 +66,10 @@ class MultiTenantConnector:
         else:
             self.engine = None
             self.SessionLocal = None
+        
+        # Users whose usage counter update failed in this process; their counters
+        # under-count, so quota checks sum usage_logs until the counters are resynced
+        self._stale_usage_counters: set = set()
     
     def set_user_context(self, user_id: str):
         """Set the current user context for all operations."""
@@ -76,6 +82,15 @@ class MultiTenantConnector:
     def clear_user_context(self):
         """Clear the current user context."""
         current_user_id.set(None)
+
+    @contextmanager
+    def user_context(self, user_id: str):
+        """Scope the user context to a ``with`` block, restoring the previous one on exit."""
+        token = current_user_id.set(user_id)
+        try:
+            yield
+        finally:
+            current_user_id.reset(token)
     
     def create_user(self, user_data: UserCreate) -> Optional[UserResponse]:
         """Create a new user with 4-day trial."""
@@ -162,7 +177,14 @@ class MultiTenantConnector:
             }
             
             response = self.supabase_client.table("users").update(update_data).eq("id", user_id).execute()
-            return len(response.data) > 0
+            if not response.data:
+                return False
+            
+            # The cached RAG engine holds the old token; rebuild it on next use.
+            # Imported here because the RAG engine module imports this one
+            from src.tools.multi_tenant_rag_engine import _drop_user_rag_engine
+            _drop_user_rag_engine(user_id)
+            return True
         except Exception as e:
             print(f"Error updating user Notion token: {str(e)}")
             return False
@@ -204,6 +226,14 @@ class MultiTenantConnector:
     @require_user_context
     def update_user_config(self, config_data: UserConfigCreate) -> bool:
         """Update current user's configuration."""
+        return self.update_and_fetch_config(config_data) is not None
+    
+    @require_user_context
+    def update_and_fetch_config(self, config_data: UserConfigCreate) -> Optional[UserConfigResponse]:
+        """Update current user's configuration and return the stored config.
+
+        The update returns the written row, so no follow-up read is needed.
+        """
         try:
             user_id = self.get_user_context()
             update_data = {
@@ -212,14 +242,25 @@ class MultiTenantConnector:
             }
             
             response = self.supabase_client.table("user_configs").update(update_data).eq("user_id", user_id).execute()
-            return len(response.data) > 0
+            
+            if response.data:
+                return UserConfigResponse(**response.data[0])
+            return None
         except Exception as e:
             print(f"Error updating user config: {str(e)}")
-            return False
+            return None
     
     @require_user_context
     def save_agent_state(self, state: Dict[str, Any], session_id: str = None) -> bool:
         """Save agent state for current user."""
+        return self.save_and_return_agent_state(state, session_id) is not None
+    
+    @require_user_context
+    def save_and_return_agent_state(self, state: Dict[str, Any], session_id: str = None) -> Optional[Dict[str, Any]]:
+        """Save agent state for current user and return the stored state.
+
+        The insert returns the written row, so no follow-up read is needed.
+        """
         try:
             user_id = self.get_user_context()
             
@@ -236,10 +277,13 @@ class MultiTenantConnector:
             }
             
             response = self.supabase_client.table("agent_states").insert(state_data).execute()
-            return len(response.data) > 0
+            
+            if response.data:
+                return self._agent_state_from_row(response.data[0])
+            return None
         except Exception as e:
             print(f"Error saving agent state: {str(e)}")
-            return False
+            return None
     
     @require_user_context
     def get_latest_agent_state(self) -> Optional[Dict[str, Any]]:
@@ -255,19 +299,22 @@ class MultiTenantConnector:
                 .execute()
             
             if response.data:
-                state = response.data[0]
-                return {
-                    "messages": state.get("conversation_history", []),
-                    "context": state.get("context", {}),
-                    "preferences": state.get("preferences", {}),
-                    "session_id": state.get("session_id"),
-                    "last_activity": state.get("last_activity")
-                }
+                return self._agent_state_from_row(response.data[0])
             return None
         except Exception as e:
             print(f"Error getting latest agent state: {str(e)}")
             return None
     
+    def _agent_state_from_row(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert an agent_states row into the agent state dict."""
+        return {
+            "messages": state.get("conversation_history", []),
+            "context": state.get("context", {}),
+            "preferences": state.get("preferences", {}),
+            "session_id": state.get("session_id"),
+            "last_activity": state.get("last_activity")
+        }
+    
     @require_user_context
     def log_usage(self, operation_type: str, operation_details: Dict[str, Any], 
                   tokens_used: int = 0, cost_usd: str = "0.00", 
@@ -291,32 +338,77 @@ class MultiTenantConnector:
             
             response = self.supabase_client.table("usage_logs").insert(usage_data).execute()
             
-            # Update user's monthly usage
-            if success:
-                self._update_monthly_usage(user_id, tokens_used)
+            # Update user's monthly usage; failed requests count against the quota too
+            self._update_monthly_usage(user_id, tokens_used)
             
             return len(response.data) > 0
         except Exception as e:
             print(f"Error logging usage: {str(e)}")
             return False
     
-    def _update_monthly_usage(self, user_id: str, tokens_used: int):
-        """Update user's monthly usage statistics."""
+    @require_user_context
+    def log_usage_many(self, events: List[Dict[str, Any]]) -> bool:
+        """Log several usage events for current user with a single multi-row insert.
+
+        Each event takes the same keys as the ``log_usage`` arguments.
+        """
+        if not events:
+            return True
         try:
-            # Get current month's usage
-            current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            user_id = self.get_user_context()
+            created_at = datetime.utcnow().isoformat()
+            
+            usage_rows = [
+                {
+                    "user_id": user_id,
+                    "operation_type": event["operation_type"],
+                    "operation_details": event.get("operation_details", {}),
+                    "tokens_used": event.get("tokens_used", 0),
+                    "cost_usd": event.get("cost_usd", "0.00"),
+                    "response_time_ms": event.get("response_time_ms"),
+                    "success": event.get("success", True),
+                    "error_message": event.get("error_message"),
+                    "created_at": created_at
+                }
+                for event in events
+            ]
+            
+            response = self.supabase_client.table("usage_logs").insert(usage_rows).execute()
             
-            # Update monthly tokens used
-            self.supabase_client.table("users") \
-                .update({
-                    "monthly_tokens_used": text("monthly_tokens_used + :tokens"),
-                    "last_activity": datetime.utcnow().isoformat()
-                }) \
-                .eq("id", user_id) \
-                .execute(params={"tokens": tokens_used})
+            # Update user's monthly usage once for the whole batch
+            self._update_monthly_usage(
+                user_id, sum(row["tokens_used"] for row in usage_rows), requests=len(usage_rows)
+            )
+            
+            return len(response.data) == len(usage_rows)
+        except Exception as e:
+            print(f"Error logging usage batch: {str(e)}")
+            return False
+    
+    def _update_monthly_usage(self, user_id: str, tokens_used: int, requests: int = 1):
+        """Increment user's monthly usage counters atomically (resets on a new month)."""
+        try:
+            self.supabase_client.rpc(
+                "increment_user_usage",
+                {"p_user_id": user_id, "p_tokens": tokens_used, "p_requests": requests}
+            ).execute()
         except Exception as e:
+            self._stale_usage_counters.add(user_id)
             print(f"Error updating monthly usage: {str(e)}")
     
+    def _resync_monthly_usage(self, user_id: str, summary: Dict[str, Any]):
+        """Overwrite user's monthly usage counters with totals summed from usage_logs."""
+        try:
+            current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            self.supabase_client.table("users").update({
+                "monthly_requests": summary.get("monthly_requests", 0),
+                "monthly_tokens_used": summary.get("total_tokens", 0),
+                "period_started_at": current_month.isoformat()
+            }).eq("id", user_id).execute()
+            self._stale_usage_counters.discard(user_id)
+        except Exception as e:
+            print(f"Error resyncing monthly usage: {str(e)}")
+    
     @require_user_context
     def get_usage_logs(self, limit: int = 50, offset: int = 0) -> List[UsageLogResponse]:
         """Get usage logs for current user."""
@@ -383,36 +475,39 @@ class MultiTenantConnector:
             
             # Check if trial has expired
             if user.subscription_tier == SubscriptionTier.TRIAL and user.trial_ends_at:
-                trial_end = user.trial_ends_at
-                if isinstance(trial_end, str):
-                    trial_end = datetime.fromisoformat(trial_end.replace('Z', '+00:00'))
-                
-                if datetime.utcnow() > trial_end:
+                if time.time() > user.trial_ends_at_epoch:
                     return {"allowed": False, "reason": "Trial period has expired. Please upgrade to continue."}
             
-            summary = self.get_monthly_usage_summary()
+            # Read the denormalized counters when they cover this month. Counters from an
+            # earlier month, never set, or with a failed update are re-derived from usage_logs
+            current_period = datetime.utcnow().strftime("%Y-%m")
+            if (user.period_started_at and user.period_started_at.strftime("%Y-%m") == current_period
+                    and user.id not in self._stale_usage_counters):
+                monthly_requests = user.monthly_requests
+                monthly_tokens = user.monthly_tokens_used
+            else:
+                summary = self.get_monthly_usage_summary()
+                if not summary:
+                    return {"allowed": False, "reason": "Usage data unavailable"}
+                monthly_requests = summary.get("monthly_requests", 0)
+                monthly_tokens = summary.get("total_tokens", 0)
+                # Put the counters back in step so the next check can read them again
+                self._resync_monthly_usage(user.id, summary)
             
             # Check subscription tier limits
-            tier_limits = {
-                SubscriptionTier.TRIAL: {"requests": 120, "tokens": 50000},  # 7-day trial limits
-                SubscriptionTier.PRO: {"requests": 1000, "tokens": 1000000},
-                SubscriptionTier.PLUS: {"requests": 2500, "tokens": 2500000},
-                SubscriptionTier.TEAMS: {"requests": 5000, "tokens": 5000000}
-            }
-            
-            limits = tier_limits.get(user.subscription_tier, tier_limits[SubscriptionTier.TRIAL])
+            request_limit, token_limit = TIER_LIMITS[user.subscription_tier.rank]
             
             # Check if user has exceeded limits
-            if summary.get("monthly_requests", 0) >= limits["requests"]:
+            if monthly_requests >= request_limit:
                 return {"allowed": False, "reason": "Monthly request limit exceeded"}
             
-            if summary.get("total_tokens", 0) >= limits["tokens"]:
+            if monthly_tokens >= token_limit:
                 return {"allowed": False, "reason": "Monthly token limit exceeded"}
             
             return {
                 "allowed": True,
-                "remaining_requests": limits["requests"] - summary.get("monthly_requests", 0),
-                "remaining_tokens": limits["tokens"] - summary.get("total_tokens", 0),
+                "remaining_requests": request_limit - monthly_requests,
+                "remaining_tokens": token_limit - monthly_tokens,
                 "trial_expires": user.trial_ends_at if user.subscription_tier == SubscriptionTier.TRIAL else None
             }
         except Exception as e:
@@ -420,8 +515,8 @@ class MultiTenantConnector:
             return {"allowed": False, "reason": "Error checking quota"}
     
     @require_user_context
-    def upgrade_subscription(self, new_tier: SubscriptionTier) -> bool:
-        """Upgrade user's subscription tier."""
+    def upgrade_subscription(self, new_tier: SubscriptionTier) -> Optional[UserResponse]:
+        """Upgrade user's subscription tier and return the updated user."""
         try:
             user_id = self.get_user_context()
             
@@ -432,10 +527,13 @@ class MultiTenantConnector:
             }
             
             response = self.supabase_client.table("users").update(update_data).eq("id", user_id).execute()
-            return len(response.data) > 0
+            
+            if response.data:
+                return UserResponse(**response.data[0])
+            return None
         except Exception as e:
             print(f"Error upgrading subscription: {str(e)}")
-            return False
+            return None
     
     @require_user_context
     def get_trial_status(self) -> Dict[str, Any]:
@@ -451,22 +549,17 @@ class MultiTenantConnector:
             if not user.trial_ends_at:
                 return {"is_trial": True, "error": "Trial end date not set"}
             
-            trial_end = user.trial_ends_at
-            if isinstance(trial_end, str):
-                trial_end = datetime.fromisoformat(trial_end.replace('Z', '+00:00'))
-            
-            now = datetime.utcnow()
-            time_remaining = trial_end - now
+            seconds_remaining = user.trial_ends_at_epoch - int(time.time())
             
-            if time_remaining.total_seconds() <= 0:
+            if seconds_remaining <= 0:
                 return {
                     "is_trial": True,
                     "expired": True,
                     "message": "Trial has expired"
                 }
             
-            days_remaining = time_remaining.days
-            hours_remaining = time_remaining.seconds // 3600
+            days_remaining, seconds_in_day = divmod(seconds_remaining, 86400)
+            hours_remaining = seconds_in_day // 3600
             
             return {
                 "is_trial": True,
@@ -2,11 +2,11 @@
 Multi-tenant database schema.
 Implements user isolation, row-level security, and user-specific configurations.
 """
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 from enum import Enum
-from pydantic import BaseModel, Field
-from sqlalchemy import Column, String, DateTime, JSON, Boolean, Integer, ForeignKey, Text
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import Column, String, DateTime, JSON, Boolean, Integer, BigInteger, ForeignKey, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -16,11 +16,22 @@ Base = declarative_base()
 
 
 class SubscriptionTier(str, Enum):
-    """User subscription tiers."""
-    TRIAL = "trial"  # 4-day free trial
-    PRO = "pro"      # Individual plan
-    PLUS = "plus"    # Enhanced individual and professional plan
-    TEAMS = "teams"  # Team collaboration plan
+    """User subscription tiers, in ascending order; `rank` indexes the tier tables below."""
+    TRIAL = ("trial", 0)  # 4-day free trial
+    PRO = ("pro", 1)      # Individual plan
+    PLUS = ("plus", 2)    # Enhanced individual and professional plan
+    TEAMS = ("teams", 3)  # Team collaboration plan
+    
+    def __new__(cls, value: str, rank: int):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        member.rank = rank
+        return member
+
+
+# Per-tier monthly (requests, tokens) limits and list prices, indexed by SubscriptionTier.rank
+TIER_LIMITS = ((120, 50_000), (1000, 1_000_000), (2500, 2_500_000), (5000, 5_000_000))
+TIER_PRICES_CENTS = (0, 1000, 1900, 4900)
 
 
 class User(Base):
@@ -43,9 +54,10 @@ class User(Base):
     trial_ends_at = Column(DateTime, nullable=True)  # When trial expires
     billing_customer_id = Column(String(255), nullable=True)
     
-    # Usage tracking
+    # Usage tracking (denormalized counters, maintained by increment_user_usage)
     monthly_requests = Column(Integer, default=0, nullable=False)
-    monthly_tokens_used = Column(Integer, default=0, nullable=False)
+    monthly_tokens_used = Column(BigInteger, default=0, nullable=False)
+    period_started_at = Column(DateTime, nullable=True)  # Month the counters belong to
     last_activity = Column(DateTime, nullable=True)
     
     # Team information (for Teams plan)
@@ -155,9 +167,26 @@ class UserResponse(BaseModel):
     last_activity: Optional[datetime] = None
     team_id: Optional[str] = None
     team_role: Optional[str] = None
+    monthly_requests: int = 0
+    monthly_tokens_used: int = 0
+    period_started_at: Optional[datetime] = None
+    # Trial end as Unix seconds, computed once when the model is built; not part of the API payload
+    trial_ends_at_epoch: Optional[int] = Field(None, exclude=True)
     
     class Config:
         from_attributes = True
+    
+    @model_validator(mode="after")
+    def _set_trial_ends_at_epoch(self):
+        """Precompute trial_ends_at_epoch (naive timestamps are treated as UTC)."""
+        trial_end = self.trial_ends_at
+        if trial_end is None:
+            self.trial_ends_at_epoch = None
+        else:
+            if trial_end.tzinfo is None:
+                trial_end = trial_end.replace(tzinfo=timezone.utc)
+            self.trial_ends_at_epoch = int(trial_end.timestamp())
+        return self
 
 
 class UserConfigCreate(BaseModel):
@@ -238,13 +267,58 @@ RLS_POLICIES = {
 }
 
 
+# Atomic per-user usage counter update, called via Supabase RPC from log_usage.
+# Counters roll over to zero when the stored period is older than the current month.
+# Users without a period yet are seeded from this month's usage_logs when the
+# function is installed, so usage logged before the counters existed still counts.
+USAGE_COUNTER_FUNCTION = """
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS period_started_at TIMESTAMPTZ;
+    ALTER TABLE users ALTER COLUMN monthly_tokens_used TYPE BIGINT;
+
+    UPDATE users SET
+        monthly_requests = (
+            SELECT count(*) FROM usage_logs
+            WHERE usage_logs.user_id = users.id AND created_at >= date_trunc('month', now())),
+        monthly_tokens_used = (
+            SELECT COALESCE(sum(tokens_used), 0) FROM usage_logs
+            WHERE usage_logs.user_id = users.id AND created_at >= date_trunc('month', now())),
+        period_started_at = date_trunc('month', now())
+    WHERE period_started_at IS NULL;
+
+    CREATE OR REPLACE FUNCTION increment_user_usage(p_user_id UUID, p_tokens BIGINT, p_requests INT)
+    RETURNS VOID LANGUAGE sql AS $$
+        UPDATE users SET
+            monthly_tokens_used = CASE
+                WHEN period_started_at IS NULL OR period_started_at < date_trunc('month', now()) THEN 0
+                ELSE monthly_tokens_used END + p_tokens,
+            monthly_requests = CASE
+                WHEN period_started_at IS NULL OR period_started_at < date_trunc('month', now()) THEN 0
+                ELSE monthly_requests END + p_requests,
+            period_started_at = CASE
+                WHEN period_started_at IS NULL OR period_started_at < date_trunc('month', now())
+                THEN date_trunc('month', now())
+                ELSE period_started_at END,
+            last_activity = now()
+        WHERE id = p_user_id;
+    $$;
+"""
+
+
 def create_tables(engine):
-    """Create all tables in the database."""
+    """Create all tables in the database, plus the usage counter function log_usage relies on."""
     Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        create_usage_counter_function(connection)
 
 
 def enable_rls(connection):
     """Enable row-level security on all tables."""
     for table_name, policy in RLS_POLICIES.items():
         connection.execute(f"ALTER TABLE {table_name} ENABLE ROW LEVEL SECURITY;")
-        connection.execute(policy) 
\ No newline at end of file
+        connection.execute(policy) 
+
+
+def create_usage_counter_function(connection):
+    """Add the usage counter columns and the increment_user_usage function."""
+    # Raw driver SQL: the function body is not a bound-parameter template
+    connection.exec_driver_sql(USAGE_COUNTER_FUNCTION)
@@ -0,0 +1,17 @@
+"""JSON encode/decode shared by the agent, the RAG engine and the test scripts.
+
+Uses orjson when it is installed and the standard library otherwise. `loads`
+accepts str or bytes and `dumps` returns bytes either way. orjson's
+JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+    loads, dumps = orjson.loads, orjson.dumps
+except ImportError:
+    loads = json.loads
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
@@ -3,8 +3,15 @@ User isolation middleware for FastAPI.
 Handles user context, authentication, and request isolation.
 """
 import os
+import time
+import hmac
+import json
+import base64
+import hashlib
 import jwt
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextvars import ContextVar
@@ -14,6 +21,17 @@ from src.db.multi_tenant_connector import multi_tenant_db, current_user_id
 # Security scheme for JWT tokens
 security = HTTPBearer()
 
+# JWT signing setup, resolved once at import
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")
+JWT_ALGORITHM = "HS256"
+_JWT_ALGORITHMS = [JWT_ALGORITHM]
+_JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+_jwt = jwt.PyJWT()
+
+# HS256 signing state for create_jwt_token: fixed header segment and a keyed HMAC copied per token
+_JWT_HEADER_SEGMENT = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+_JWT_HMAC = hmac.new(JWT_SECRET_KEY.encode(), digestmod=hashlib.sha256)
+
 # Context variable for current request user
 current_request_user: ContextVar[Optional[Dict[str, Any]]] = ContextVar('current_request_user', default=None)
 
@@ -23,8 +41,8 @@ class UserIsolationMiddleware:
     
     def __init__(self, app):
         self.app = app
-        self.secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key")
-        self.algorithm = "HS256"
+        self.secret_key = JWT_SECRET_KEY
+        self.algorithm = JWT_ALGORITHM
     
     async def __call__(self, scope, receive, send):
         if scope["type"] == "http":
@@ -32,13 +50,19 @@ class UserIsolationMiddleware:
             request = Request(scope, receive)
             user = await self._get_user_from_request(request)
             
-            if user:
-                # Set user context for this request
-                current_request_user.set(user)
-                multi_tenant_db.set_user_context(user["id"])
-            
             # Add user to scope for downstream use
             scope["user"] = user
+            
+            if user:
+                # Scope the user context to this request; handlers read it instead of setting it
+                request_token = current_request_user.set(user)
+                user_token = current_user_id.set(user["id"])
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    current_user_id.reset(user_token)
+                    current_request_user.reset(request_token)
+                return
         
         await self.app(scope, receive, send)
     
@@ -57,15 +81,15 @@ class UserIsolationMiddleware:
                 return None
             
             # Decode JWT token
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = decode_jwt_token(token)
             user_id = payload.get("sub")
             
             if not user_id:
                 return None
             
             # Get user from database
-            multi_tenant_db.set_user_context(user_id)
-            user = multi_tenant_db.get_user()
+            with multi_tenant_db.user_context(user_id):
+                user = multi_tenant_db.get_user()
             
             if user:
                 return {
@@ -140,18 +164,14 @@ class UserContextManager:
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.previous_user = None
+        self._token = None
     
     def __enter__(self):
-        self.previous_user = current_user_id.get()
-        multi_tenant_db.set_user_context(self.user_id)
+        self._token = current_user_id.set(self.user_id)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.previous_user:
-            multi_tenant_db.set_user_context(self.previous_user)
-        else:
-            multi_tenant_db.clear_user_context()
+        current_user_id.reset(self._token)
 
 
 def create_user_context(user_id: str) -> UserContextManager:
@@ -168,7 +188,6 @@ class RateLimiter:
     
     def is_allowed(self, user_id: str, operation: str, limit: int, window_seconds: int = 60) -> bool:
         """Check if user is allowed to perform operation."""
-        import time
         current_time = time.time()
         key = f"{user_id}:{operation}"
         
@@ -290,11 +309,29 @@ def check_trial_status():
 
 
 # Utility functions for user management
+@lru_cache(maxsize=1024)
+def _verified_claims(token: str) -> Mapping[str, Any]:
+    """Verify a token's signature once and cache its claims, read-only (errors are not cached)."""
+    return MappingProxyType(
+        _jwt.decode(token, JWT_SECRET_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS)
+    )
+
+
+def decode_jwt_token(token: str) -> Dict[str, Any]:
+    """Decode and validate a JWT token, re-checking expiry on cached claims.
+
+    Returns a fresh dict each call, so callers cannot alter the cached claims.
+    """
+    claims = _verified_claims(token)
+    if claims["exp"] <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return dict(claims)
+
+
 def get_user_from_token(token: str) -> Optional[Dict[str, Any]]:
     """Extract user from JWT token."""
     try:
-        secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key")
-        payload = jwt.decode(token, secret_key, algorithms=["HS256"])
+        payload = decode_jwt_token(token)
         user_id = payload.get("sub")
         
         if user_id:
@@ -318,17 +355,21 @@ def get_user_from_token(token: str) -> Optional[Dict[str, Any]]:
 
 def create_jwt_token(user_id: str, email: str) -> str:
     """Create JWT token for user."""
-    import time
-    secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key")
-    
+    now = int(time.time())
     payload = {
         "sub": user_id,
         "email": email,
-        "iat": int(time.time()),
-        "exp": int(time.time()) + (24 * 60 * 60)  # 24 hours
+        "iat": now,
+        "exp": now + (24 * 60 * 60)  # 24 hours
     }
     
-    return jwt.encode(payload, secret_key, algorithm="HS256")
+    payload_segment = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).rstrip(b"=")
+    signing_input = _JWT_HEADER_SEGMENT + b"." + payload_segment
+    signer = _JWT_HMAC.copy()
+    signer.update(signing_input)
+    signature = base64.urlsafe_b64encode(signer.digest()).rstrip(b"=")
+    
+    return (signing_input + b"." + signature).decode()
 
 
 # Error handling for user operations
@@ -8,7 +8,9 @@ and debugging capabilities.
 
 import os
 import time
+import queue
 import logging
+import threading
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from contextlib import contextmanager
@@ -25,6 +27,11 @@ from ..config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Finished runs wait here for the background exporter; when it is full new runs are dropped
+EXPORT_QUEUE_SIZE = 1024
+EXPORT_BATCH_SIZE = 32
+EXPORT_TIMEOUT_MS = 2000
+
 class LangSmithTracer:
     """LangSmith tracer for comprehensive agent monitoring."""
     
@@ -34,11 +41,13 @@ class LangSmithTracer:
         self.client = None
         self.project_name = self.settings.LANGSMITH_PROJECT or "notion-agent"
         self.enabled = False
+        self._export_queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
         
         if LANGSMITH_AVAILABLE and self.settings.LANGSMITH_API_KEY:
             try:
-                self.client = Client(api_key=self.settings.LANGSMITH_API_KEY)
+                self.client = Client(api_key=self.settings.LANGSMITH_API_KEY, timeout_ms=EXPORT_TIMEOUT_MS)
                 self.enabled = True
+                threading.Thread(target=self._export_worker, name="langsmith-export", daemon=True).start()
                 logger.info(f"LangSmith tracing enabled for project: {self.project_name}")
             except Exception as e:
                 logger.error(f"Failed to initialize LangSmith client: {e}")
@@ -63,7 +72,8 @@ class LangSmithTracer:
                     "user_input": user_input,
                     "timestamp": datetime.now().isoformat()
                 },
-                project_name=self.project_name
+                project_name=self.project_name,
+                client=self.client
             )
             
             logger.info(f"Starting LangSmith trace for goal: {goal}")
@@ -77,6 +87,7 @@ class LangSmithTracer:
         finally:
             if run_tree:
                 run_tree.end()
+                self._export(run_tree)
                 logger.info(f"Completed LangSmith trace for goal: {goal}")
     
     @contextmanager
@@ -95,7 +106,8 @@ class LangSmithTracer:
                 run_type="tool",
                 inputs=parameters,
                 parent_run=parent_run,
-                project_name=self.project_name
+                project_name=self.project_name,
+                client=self.client
             )
             
             logger.debug(f"Tracing tool call: {tool_name}")
@@ -110,6 +122,7 @@ class LangSmithTracer:
             if tool_run:
                 duration = time.time() - start_time
                 tool_run.end(outputs={"duration": duration})
+                self._export(tool_run)
                 logger.debug(f"Completed tool trace: {tool_name} ({duration:.2f}s)")
     
     @contextmanager
@@ -128,7 +141,8 @@ class LangSmithTracer:
                 run_type="llm",
                 inputs={"prompt": prompt},
                 parent_run=parent_run,
-                project_name=self.project_name
+                project_name=self.project_name,
+                client=self.client
             )
             
             logger.debug(f"Tracing LLM call: {model}")
@@ -143,6 +157,7 @@ class LangSmithTracer:
             if llm_run:
                 duration = time.time() - start_time
                 llm_run.end(outputs={"duration": duration})
+                self._export(llm_run)
                 logger.debug(f"Completed LLM trace: {model} ({duration:.2f}s)")
     
     def trace_decision(self, reasoning: str, action: str, confidence: float, parent_run: RunTree = None):
@@ -160,10 +175,12 @@ class LangSmithTracer:
                     "confidence": confidence
                 },
                 parent_run=parent_run,
-                project_name=self.project_name
+                project_name=self.project_name,
+                client=self.client
             )
             
             decision_run.end(outputs={"decision": action})
+            self._export(decision_run)
             logger.debug(f"Traced decision: {action} (confidence: {confidence})")
             
         except Exception as e:
@@ -180,15 +197,53 @@ class LangSmithTracer:
                 run_type="chain",
                 inputs=context,
                 parent_run=parent_run,
-                project_name=self.project_name
+                project_name=self.project_name,
+                client=self.client
             )
             
             error_run.end(error=str(error))
+            self._export(error_run)
             logger.debug(f"Traced error: {type(error).__name__}")
             
         except Exception as e:
             logger.error(f"Error tracing error: {e}")
     
+    def _export(self, run: "RunTree"):
+        """Queue a finished run for the background exporter; never blocks the caller."""
+        try:
+            self._export_queue.put_nowait(run)
+        except queue.Full:
+            logger.warning(f"LangSmith export queue full, dropping run: {run.name}")
+    
+    def _export_worker(self):
+        """Post queued runs to LangSmith in batches, off the agent's critical path."""
+        while True:
+            batch = [self._export_queue.get()]
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            for run in batch:
+                try:
+                    run.post()
+                except Exception as e:
+                    logger.error(f"Error exporting LangSmith run {run.name}: {e}")
+                finally:
+                    self._export_queue.task_done()
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait up to `timeout` seconds for queued runs to be exported; returns True once the queue is drained."""
+        deadline = time.monotonic() + timeout
+        with self._export_queue.all_tasks_done:
+            while self._export_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._export_queue.all_tasks_done.wait(remaining)
+        return True
+    
     def get_run_url(self, run_id: str) -> Optional[str]:
         """Get the URL for viewing a specific run in LangSmith."""
         if not self.enabled or not self.client:
@@ -8,7 +8,7 @@ including token usage, response times, success rates, and cost tracking.
 import time
 import logging
 import json
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterable, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
@@ -18,6 +18,9 @@ from ..db.supabase_connector import SupabaseConnector
 
 logger = logging.getLogger(__name__)
 
+# record_operation defaults for (token_count, model, success, error_message, metadata)
+_OPERATION_DEFAULTS = (None, "gemini-pro", True, None, None)
+
 @dataclass
 class PerformanceMetrics:
     """Performance metrics data structure."""
@@ -72,50 +75,70 @@ class MetricsCollector:
                         error_message: Optional[str] = None,
                         metadata: Optional[Dict[str, Any]] = None):
         """Record a single operation's performance metrics."""
-        timestamp = datetime.now()
-        
-        # Calculate cost if token count provided
-        cost_usd = None
-        if token_count:
-            cost_per_token = self.token_costs.get(model, self.token_costs["default"])
-            cost_usd = (token_count / 1000) * cost_per_token
-        
-        # Create metrics object
-        metrics = PerformanceMetrics(
-            timestamp=timestamp,
-            operation_type=operation_type,
-            duration_ms=duration_ms,
-            token_count=token_count,
-            cost_usd=cost_usd,
-            success=success,
-            error_message=error_message,
-            metadata=metadata
-        )
-        
-        # Store in memory
-        self.performance_metrics.append(metrics)
-        
-        # Update counters
-        self.operation_counts[operation_type] += 1
-        if not success:
-            self.error_counts[operation_type] += 1
+        self.record_operations_bulk([
+            (operation_type, duration_ms, token_count, model, success, error_message, metadata)
+        ])
+    
+    def record_operations_bulk(self, rows: Iterable[Tuple]):
+        """Record many operations' performance metrics in one pass.
         
-        # Store cost metrics if applicable
-        if cost_usd:
-            cost_metrics = CostMetrics(
+        Each row follows record_operation's argument order,
+        (operation_type, duration_ms, token_count, model, success, error_message, metadata);
+        trailing fields may be omitted and take record_operation's defaults.
+        """
+        timestamp = datetime.now()
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        performance_batch = []
+        cost_batch = []
+        
+        for row in rows:
+            row = tuple(row)
+            (operation_type, duration_ms, token_count, model,
+             success, error_message, metadata) = row + _OPERATION_DEFAULTS[len(row) - 2:]
+            
+            # Calculate cost if token count provided
+            cost_usd = None
+            if token_count:
+                cost_per_token = self.token_costs.get(model, self.token_costs["default"])
+                cost_usd = (token_count / 1000) * cost_per_token
+            
+            # Create metrics object
+            performance_batch.append(PerformanceMetrics(
                 timestamp=timestamp,
                 operation_type=operation_type,
-                tokens_used=token_count,
+                duration_ms=duration_ms,
+                token_count=token_count,
                 cost_usd=cost_usd,
-                model=model,
+                success=success,
+                error_message=error_message,
                 metadata=metadata
-            )
-            self.cost_metrics.append(cost_metrics)
+            ))
+            
+            # Update counters
+            self.operation_counts[operation_type] += 1
+            if not success:
+                self.error_counts[operation_type] += 1
+            
+            # Store cost metrics if applicable
+            if cost_usd:
+                cost_batch.append(CostMetrics(
+                    timestamp=timestamp,
+                    operation_type=operation_type,
+                    tokens_used=token_count,
+                    cost_usd=cost_usd,
+                    model=model,
+                    metadata=metadata
+                ))
+            
+            # Log for debugging
+            if debug_enabled:
+                cost_str = f"${cost_usd:.6f}" if cost_usd else "$0.000000"
+                logger.debug(f"Recorded {operation_type}: {duration_ms:.2f}ms, "
+                            f"tokens: {token_count}, cost: {cost_str}")
         
-        # Log for debugging
-        cost_str = f"${cost_usd:.6f}" if cost_usd else "$0.000000"
-        logger.debug(f"Recorded {operation_type}: {duration_ms:.2f}ms, "
-                    f"tokens: {token_count}, cost: {cost_str}")
+        # Store in memory
+        self.performance_metrics.extend(performance_batch)
+        self.cost_metrics.extend(cost_batch)
     
     def record_llm_call(self, 
                        model: str, 
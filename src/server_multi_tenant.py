@@ -206,7 +206,6 @@ async def list_notion_databases(
 ):
     """List databases the current user's integration can access."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         creds = multi_tenant_db.get_user_credentials() or {}
         api_key = creds.get("notion_access_token")
         notion = NotionConnector(api_key=api_key)
@@ -236,7 +235,6 @@ async def login_user(request: UserLoginRequest):
 async def get_user_profile(current_user: Dict[str, Any] = Depends(get_current_user)):
     """Get current user profile."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         user = multi_tenant_db.get_user()
         
         if not user:
@@ -258,7 +256,6 @@ async def update_notion_integration(
 ):
     """Update user's Notion integration."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         success = multi_tenant_db.update_user_notion_token(access_token, workspace_id, workspace_name)
         
         if not success:
@@ -275,7 +272,6 @@ async def update_notion_integration(
 async def get_user_config(current_user: Dict[str, Any] = Depends(get_current_user)):
     """Get user configuration."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         config = multi_tenant_db.get_user_config()
         
         if not config:
@@ -295,7 +291,6 @@ async def update_user_config(
 ):
     """Update user configuration."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         success = multi_tenant_db.update_user_config(config_data)
         
         if not success:
@@ -312,7 +307,6 @@ async def update_user_config(
 async def get_trial_status(current_user: Dict[str, Any] = Depends(get_current_user)):
     """Get user's trial status and remaining time."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         trial_status = multi_tenant_db.get_trial_status()
         
         return TrialStatusResponse(**trial_status)
@@ -329,10 +323,9 @@ async def upgrade_subscription(
 ):
     """Upgrade user's subscription tier."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
-        success = multi_tenant_db.upgrade_subscription(request.new_tier)
+        updated_user = multi_tenant_db.upgrade_subscription(request.new_tier)
         
-        if not success:
+        if updated_user is None:
             raise HTTPException(status_code=400, detail="Failed to upgrade subscription")
         
         return {
@@ -421,7 +414,6 @@ async def run_agent(
 ):
     """Run the agent for the current user."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         
         # Create user-specific RAG engine
         rag_engine = create_user_rag_engine(current_user["id"])
@@ -476,7 +468,6 @@ async def search_tasks(
 ):
     """Search for tasks using RAG."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         
         # Create user-specific RAG engine
         rag_engine = create_user_rag_engine(current_user["id"])
@@ -504,7 +495,6 @@ async def update_task(
 ):
     """Update a task in Notion."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         
         # In a full implementation, you'd update the task in Notion
         # For now, return a mock response
@@ -529,7 +519,6 @@ async def create_task(
 ):
     """Create a new task in Notion."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         
         # In a full implementation, you'd create the task in Notion
         # For now, return a mock response
@@ -555,7 +544,6 @@ async def send_notification(
 ):
     """Send a notification."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         
         # In a full implementation, you'd send the notification
         # For now, return a mock response
@@ -579,7 +567,6 @@ async def send_notification(
 async def get_usage_summary(current_user: Dict[str, Any] = Depends(get_current_user)):
     """Get user's usage summary."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         summary = multi_tenant_db.get_monthly_usage_summary()
         
         return UsageSummaryResponse(**summary)
@@ -597,7 +584,6 @@ async def get_usage_logs(
 ):
     """Get user's usage logs."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         logs = multi_tenant_db.get_usage_logs(limit, offset)
         
         return {
@@ -615,7 +601,6 @@ async def get_usage_logs(
 async def get_user_quota(current_user: Dict[str, Any] = Depends(get_current_user)):
     """Get user's current quota status."""
     try:
-        multi_tenant_db.set_user_context(current_user["id"])
         quota = multi_tenant_db.check_user_quota()
         
         return quota
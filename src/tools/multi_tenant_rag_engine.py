@@ -5,6 +5,8 @@ Creates separate ChromaDB instances per user for complete data isolation.
 import os
 import json
 import pathlib
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 from dateutil import parser as date_parser
@@ -496,9 +498,43 @@ class MultiTenantRAGEngine:
             
         except Exception as e:
             print(f"Error cleaning up user data for {self.user_id}: {str(e)}")
+        finally:
+            # Drop this user's cached engine so the next request rebuilds their store,
+            # including after a partial cleanup
+            _drop_user_rag_engine(self.user_id)
+
+
+# Per-user engine cache, least recently used first
+ENGINE_CACHE_SIZE = 512
+_user_engines: "OrderedDict[str, MultiTenantRAGEngine]" = OrderedDict()
+_user_engines_lock = threading.Lock()
 
 
 # Factory function to create RAG engine for a user
 def create_user_rag_engine(user_id: str) -> MultiTenantRAGEngine:
-    """Create a RAG engine instance for a specific user."""
-    return MultiTenantRAGEngine(user_id) 
\ No newline at end of file
+    """Return the RAG engine for a specific user, creating it on first use.
+
+    Engines are cached per user so the Chroma client and collections are only
+    opened once per process. An engine holds the user's Notion token from when
+    it was built, so changing the token must drop it (see update_user_notion_token).
+    """
+    with _user_engines_lock:
+        engine = _user_engines.get(user_id)
+        if engine is not None:
+            _user_engines.move_to_end(user_id)
+            return engine
+
+    engine = MultiTenantRAGEngine(user_id)
+    with _user_engines_lock:
+        # Another thread may have built one meanwhile; keep the first
+        engine = _user_engines.setdefault(user_id, engine)
+        _user_engines.move_to_end(user_id)
+        while len(_user_engines) > ENGINE_CACHE_SIZE:
+            _user_engines.popitem(last=False)
+    return engine
+
+
+def _drop_user_rag_engine(user_id: str):
+    """Forget a user's cached engine, leaving every other user's in place."""
+    with _user_engines_lock:
+        _user_engines.pop(user_id, None)
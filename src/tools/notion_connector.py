@@ -1,7 +1,9 @@
 
 # Notion API connector for the autonomous task management agent.
+import asyncio
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 
@@ -15,6 +17,32 @@ from src.schema.notion_schemas import NotionTaskSchema, TaskStatus, RoutineSchem
 load_dotenv()
 
 
+# Event loop -> {api_key: client}. httpx pools belong to the loop that opened them,
+# so clients are only shared within one loop. Entries for closed loops are pruned
+# whenever a new loop asks for a client; the lock covers connectors used from
+# worker threads that each run their own loop.
+_loop_clients: Dict[asyncio.AbstractEventLoop, Dict[str, AsyncClient]] = {}
+_loop_clients_lock = threading.Lock()
+
+
+def _notion_client(api_key: str) -> AsyncClient:
+    """Notion client for this API key, shared by every connector running on the current event loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return AsyncClient(auth=api_key)
+    with _loop_clients_lock:
+        clients = _loop_clients.get(loop)
+        if clients is None:
+            for closed in [l for l in _loop_clients if l.is_closed()]:
+                del _loop_clients[closed]
+            clients = _loop_clients[loop] = {}
+        client = clients.get(api_key)
+        if client is None:
+            client = clients[api_key] = AsyncClient(auth=api_key)
+        return client
+
+
 class NotionConnector:
     """
     Connector for the Notion API.
@@ -31,10 +59,14 @@ class NotionConnector:
         if not self.api_key:
             raise ValueError("NOTION_API_KEY environment variable not set")
         
-        self.client = AsyncClient(auth=self.api_key)
         # IDs may be provided later from user config
         self.tasks_db_id = os.getenv("NOTION_TASKS_DATABASE_ID")
         self.routines_db_id = os.getenv("NOTION_ROUTINES_DATABASE_ID")
+
+    @property
+    def client(self) -> AsyncClient:
+        """Notion client for the running event loop; connectors on the same loop share its connection pool."""
+        return _notion_client(self.api_key)
     
     def _property_value_to_python(self, property_type: str, property_value: Any) -> Any:
         """Convert Notion property values to Python objects."""
@@ -1,19 +1,20 @@
 """
 RAG (Retrieval Augmented Generation) engine for the Notion agent.
 """
+import asyncio
+import hashlib
 import os
-import json
+import time
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 import pathlib
-import json as _json
-from dateutil import parser as date_parser
 
 from dotenv import load_dotenv
 import chromadb
 from chromadb import PersistentClient
 from chromadb.config import Settings
 import google.generativeai as genai
+from src.json_codec import loads as _jloads, dumps as _jdumps
 from src.tools.notion_connector import NotionConnector
 from src.schema.notion_schemas import NotionTaskSchema, RoutineSchema
 
@@ -23,6 +24,40 @@ load_dotenv()
 # Configure Google API
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+# (attribute, label, formatter) for each optional line of a task document
+_TASK_DOC_FIELDS = (
+    ("status", "Status", str),
+    ("priority", "Priority", str),
+    ("due_date", "Due Date", str),
+    ("scheduled_time", "Scheduled Time", str),
+    ("estimated_duration", "Estimated Duration", lambda v: f"{v} minutes"),
+    ("tags", "Tags", ", ".join),
+    ("notes", "Notes", str),
+)
+
+
+def _task_document(task) -> str:
+    """Text embedded for a task: its title plus every populated field in _TASK_DOC_FIELDS."""
+    parts = [f"Task: {task.title}"]
+    for attr, label, fmt in _TASK_DOC_FIELDS:
+        value = getattr(task, attr)
+        if value:
+            parts.append(f"{label}: {fmt(value)}")
+    return "\n".join(parts) + "\n"
+
+
+def _content_hash(doc_text: str) -> str:
+    """Digest of a task's document text, stored on its chunks to detect edits."""
+    return hashlib.blake2b(doc_text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _task_manifest(content_hashes: Dict[str, str]) -> str:
+    """Digest of every task's (id, content hash); it only changes when a task is added, removed or edited."""
+    digest = hashlib.blake2b(digest_size=16)
+    for task_id, content_hash in sorted(content_hashes.items()):
+        digest.update(f"{task_id}:{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
 
 class RAGEngine:
     """
@@ -82,17 +117,40 @@ class RAGEngine:
         if len(words) <= max_words:
             return [text]
 
-        chunks: List[str] = []
-        start = 0
-        while start < len(words):
-            end = start + max_words
-            chunk = " ".join(words[start:end])
-            chunks.append(chunk)
-            # move start forward keeping an overlap
-            start = end - overlap
-            if start < 0:
-                start = 0
+        # Full windows one step apart, then a shorter tail window for any words past the last one
+        step = max_words - overlap
+        starts = range(0, len(words) - max_words + 1, step)
+        chunks = [" ".join(words[start:start + max_words]) for start in starts]
+        if starts[-1] + max_words < len(words):
+            chunks.append(" ".join(words[starts[-1] + step:]))
         return chunks
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of chunk texts in one call to the embedding function."""
+        return self.embedding_function(texts)
+    
+    def _replace_chunks(self, collection, parent_ids: List[str], ids: List[str],
+                        documents: List[str], metadatas: List[Dict[str, Any]],
+                        existing_ids: Optional[List[str]] = None):
+        """Replace every chunk of the given parents with the new ones using bulk calls.
+
+        One lookup finds the parents' existing chunk ids (skipped when the caller already
+        has them), chunks that no longer exist are deleted in one call, and all new chunks
+        are embedded and written in one upsert.
+        """
+        if existing_ids is None:
+            existing_ids = collection.get(where={"parent_id": {"$in": parent_ids}}, include=[])["ids"]
+        stale_ids = set(existing_ids) - set(ids)
+        if stale_ids:
+            collection.delete(ids=list(stale_ids))
+
+        if ids:
+            collection.upsert(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=self._embed_batch(documents)
+            )
     
     async def sync_notion_data(self):
         """
@@ -104,9 +162,11 @@ class RAGEngine:
         """
         last_sync = self.sync_state.get("last_sync")
 
-        # Sync tasks and routines incrementally
-        task_stats = await self._sync_tasks(last_sync)
-        routine_stats = await self._sync_routines(last_sync)
+        # Sync tasks and routines incrementally; they target separate collections,
+        # so their Notion fetches can overlap
+        task_stats, routine_stats = await asyncio.gather(
+            self._sync_tasks(last_sync), self._sync_routines(last_sync)
+        )
 
         # Update sync state
         self.sync_state["last_sync"] = datetime.utcnow().isoformat()
@@ -123,19 +183,39 @@ class RAGEngine:
         }
     
     async def _sync_tasks(self, last_sync: Optional[str] = None):
-        """Sync tasks from Notion to ChromaDB."""
+        """Sync tasks from Notion to ChromaDB.
+
+        Edits are detected by comparing each task's content hash with the one stored on its
+        chunks, so only tasks whose text changed are re-embedded. `last_sync` is accepted
+        for symmetry with `_sync_routines` but not needed.
+        """
         # Get all tasks from Notion
         tasks = await self.notion.get_tasks()
-        
-        # If last_sync is provided, filter tasks that were edited after that time
-        if last_sync:
-            try:
-                last_sync_dt = date_parser.isoparse(last_sync)
-                tasks = [t for t in tasks if t.last_edited_time and date_parser.isoparse(t.last_edited_time) > last_sync_dt]
-            except Exception:
-                pass  # If parsing fails, fall back to full sync
+        task_docs = [(task, _task_document(task)) for task in tasks]
+        content_hashes = {task.id: _content_hash(doc_text) for task, doc_text in task_docs}
+
+        # Nothing changed since the last sync: skip the per-task scan entirely
+        manifest = _task_manifest(content_hashes)
+        if manifest == self.sync_state.get("tasks_manifest"):
+            return {"tasks_processed": 0, "chunks_created": 0}
+
+        # One lookup for the hashes stored on every task's existing chunks
+        stored_ids: Dict[str, List[str]] = {}
+        stored_hashes: Dict[str, str] = {}
+        if content_hashes:
+            stored = self.tasks_collection.get(
+                where={"parent_id": {"$in": list(content_hashes)}}, include=["metadatas"]
+            )
+            for chunk_id, meta in zip(stored["ids"], stored["metadatas"]):
+                stored_ids.setdefault(meta["parent_id"], []).append(chunk_id)
+                stored_hashes[meta["parent_id"]] = meta.get("content_hash", "")
 
-        if not tasks:
+        # Keep only tasks whose content differs from what is stored
+        task_docs = [(task, doc_text) for task, doc_text in task_docs
+                     if stored_hashes.get(task.id) != content_hashes[task.id]]
+
+        if not task_docs:
+            self.sync_state["tasks_manifest"] = manifest
             return {"tasks_processed": 0, "chunks_created": 0}  # Nothing to update
         
         # Prepare data for ChromaDB (with chunking)
@@ -143,65 +223,40 @@ class RAGEngine:
         documents: List[str] = []
         metadatas: List[Dict[str, Any]] = []
         parent_ids: List[str] = []
+        existing_ids: List[str] = []
         
-        for task in tasks:
+        for task, doc_text in task_docs:
             parent_ids.append(task.id)
-            # Create the document text for embedding (aggregate details)
-            doc_text = f"Task: {task.title}\n"
-            
-            if task.status:
-                doc_text += f"Status: {task.status}\n"
-                
-            if task.priority:
-                doc_text += f"Priority: {task.priority}\n"
-                
-            if task.due_date:
-                doc_text += f"Due Date: {task.due_date}\n"
-                
-            if task.scheduled_time:
-                doc_text += f"Scheduled Time: {task.scheduled_time}\n"
-                
-            if task.estimated_duration:
-                doc_text += f"Estimated Duration: {task.estimated_duration} minutes\n"
-                
-            if task.tags:
-                doc_text += f"Tags: {', '.join(task.tags)}\n"
-                
-            if task.notes:
-                doc_text += f"Notes: {task.notes}\n"
+            existing_ids.extend(stored_ids.get(task.id, ()))
             
             # Split into chunks for embedding
             chunks = self._chunk_text(doc_text)
+
+            # Metadata shared by every chunk of this task
+            base_meta = {
+                "parent_id": task.id,
+                "title": task.title,
+                "status": task.status,
+                "priority": task.priority if task.priority else "",
+                "due_date": task.due_date if task.due_date else "",
+                "url": task.url,
+                "type": "task",
+                "content_hash": content_hashes[task.id],
+            }
             
             for idx, chunk in enumerate(chunks):
                 chunk_id = f"{task.id}_chunk_{idx}"
                 ids.append(chunk_id)
                 documents.append(chunk)
-                metadata = {
-                    "id": chunk_id,
-                    "parent_id": task.id,
-                    "title": task.title,
-                    "status": task.status,
-                    "priority": task.priority if task.priority else "",
-                    "due_date": task.due_date if task.due_date else "",
-                    "url": task.url,
-                    "type": "task",
-                    "chunk_index": idx
-                }
+                metadata = base_meta.copy()
+                metadata["id"] = chunk_id
+                metadata["chunk_index"] = idx
                 metadatas.append(metadata)
         
-        # Remove existing embeddings for the affected parent tasks first
-        for pid in parent_ids:
-            self.tasks_collection.delete(where={"parent_id": pid})
-
-        if ids:
-            self.tasks_collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
+        self._replace_chunks(self.tasks_collection, parent_ids, ids, documents, metadatas, existing_ids)
         
-        return {"tasks_processed": len(tasks), "chunks_created": len(ids)}
+        self.sync_state["tasks_manifest"] = manifest
+        return {"tasks_processed": len(task_docs), "chunks_created": len(ids)}
     
     async def _sync_routines(self, last_sync: Optional[str] = None):
         """
@@ -284,16 +339,7 @@ class RAGEngine:
                 }
                 metadatas.append(metadata)
         
-        # Remove existing embeddings for affected routines
-        for pid in parent_ids:
-            self.routines_collection.delete(where={"parent_id": pid})
-
-        if ids:
-            self.routines_collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
+        self._replace_chunks(self.routines_collection, parent_ids, ids, documents, metadatas)
         
         return {"routines_processed": len(routines), "chunks_created": len(ids)}
 
@@ -302,8 +348,9 @@ class RAGEngine:
     def _load_sync_state(self) -> Dict[str, Any]:
         if self.sync_state_path.exists():
             try:
-                with self.sync_state_path.open("r", encoding="utf-8") as f:
-                    return _json.load(f)
+                with self.sync_state_path.open("rb") as f:
+                    data = f.read()
+                return _jloads(data)
             except Exception:
                 return {}
         return {}
@@ -311,10 +358,18 @@ class RAGEngine:
     def _save_sync_state(self):
         try:
             self.sync_state_path.parent.mkdir(parents=True, exist_ok=True)
-            with self.sync_state_path.open("w", encoding="utf-8") as f:
-                _json.dump(self.sync_state, f)
+            with self.sync_state_path.open("wb") as f:
+                f.write(_jdumps(self.sync_state))
         except Exception as e:
             print(f"Error saving RAG sync state: {e}")
+
+    def is_fresh(self, ttl_seconds: int = 600) -> bool:
+        """Whether the last sync finished within `ttl_seconds`, judged by the sync state file's mtime."""
+        try:
+            age = time.time() - self.sync_state_path.stat().st_mtime
+        except OSError:
+            return False
+        return age < ttl_seconds
     
     def search_tasks(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """
@@ -340,18 +395,12 @@ class RAGEngine:
         if not results or not results['ids'] or not results['ids'][0]:
             return []
             
-        tasks = []
-        for i, task_id in enumerate(results['ids'][0]):
-            metadata = results['metadatas'][0][i]
-            document = results['documents'][0][i]
-            
-            tasks.append({
-                "id": task_id,
-                "metadata": metadata,
-                "content": document
-            })
-        
-        return tasks
+        return [
+            {"id": task_id, "metadata": metadata, "content": document}
+            for task_id, metadata, document in zip(
+                results['ids'][0], results['metadatas'][0], results['documents'][0]
+            )
+        ]
     
     def search_routines(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
         """
@@ -372,18 +421,12 @@ class RAGEngine:
         if not results or not results['ids'] or not results['ids'][0]:
             return []
             
-        routines = []
-        for i, routine_id in enumerate(results['ids'][0]):
-            metadata = results['metadatas'][0][i]
-            document = results['documents'][0][i]
-            
-            routines.append({
-                "id": routine_id,
-                "metadata": metadata,
-                "content": document
-            })
-        
-        return routines
+        return [
+            {"id": routine_id, "metadata": metadata, "content": document}
+            for routine_id, metadata, document in zip(
+                results['ids'][0], results['metadatas'][0], results['documents'][0]
+            )
+        ]
     
     def build_context(self, query: str) -> Dict[str, Any]:
         """
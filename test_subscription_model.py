@@ -2,224 +2,186 @@
 Simple test script to verify the new subscription model logic.
 Tests the subscription tiers, trial period, and quota calculations.
 """
-import os
+import calendar
 import sys
 from datetime import datetime, timedelta, timezone
-from enum import Enum
+from types import SimpleNamespace
+
+import pytest
+
+from src.db.multi_tenant_schema import SubscriptionTier, TIER_LIMITS, TIER_PRICES_CENTS, UserResponse
+from src.db.multi_tenant_connector import MultiTenantConnector
+
+TRIAL, PRO, PLUS, TEAMS = SubscriptionTier.TRIAL, SubscriptionTier.PRO, SubscriptionTier.PLUS, SubscriptionTier.TEAMS
+
+# (tier, monthly requests, monthly tokens)
+QUOTA_CASES = [
+    (TRIAL, 120, 50_000),
+    (PRO, 1000, 1_000_000),
+    (PLUS, 2500, 2_500_000),
+    (TEAMS, 5000, 5_000_000),
+]
+
+# (tier, price in cents, display price, billing duration)
+PRICING_CASES = [
+    (TRIAL, 0, "Free", "7 days"),
+    (PRO, 1000, "$10/month", "Monthly"),
+    (PLUS, 1900, "$19/month", "Monthly"),
+    (TEAMS, 4900, "$49/month + $12/user", "Monthly"),
+]
+
+FEATURES = {
+    TRIAL: [
+        "Basic agent functionality",
+        "Notion integration",
+        "Task management",
+        "7-day trial period"
+    ],
+    PRO: [
+        "Full agent functionality",
+        "Advanced task management",
+        "Priority support",
+        "Usage analytics"
+    ],
+    PLUS: [
+        "Everything in Pro",
+        "Advanced analytics",
+        "Custom integrations",
+        "API access"
+    ],
+    TEAMS: [
+        "Everything in Plus",
+        "Team collaboration",
+        "Admin dashboard",
+        "Custom onboarding"
+    ]
+}
+
+UPGRADE_PATHS = {
+    TRIAL: [PRO, PLUS, TEAMS],
+    PRO: [PLUS, TEAMS],
+    PLUS: [TEAMS],
+    TEAMS: []  # No upgrades from Teams
+}
+
+# Each tier paired with the next one up
+TIER_STEPS = list(zip(SubscriptionTier, list(SubscriptionTier)[1:]))
+
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+def make_user(tier=TRIAL, trial_ends_at=None):
+    """UserResponse with this month's usage counters at zero."""
+    now = datetime.now(timezone.utc)
+    return UserResponse(
+        id="user-1",
+        email="user@example.com",
+        created_at=now,
+        subscription_tier=tier,
+        trial_ends_at=trial_ends_at,
+        period_started_at=now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+    )
 
-# Mock environment variables
-os.environ.setdefault("SUPABASE_URL", "https://mock-project.supabase.co")
-os.environ.setdefault("SUPABASE_KEY", "mock-supabase-key")
-os.environ.setdefault("JWT_SECRET_KEY", "mock-jwt-secret-key")
 
-from src.db.multi_tenant_schema import SubscriptionTier
+def check_quota(user):
+    """Run MultiTenantConnector.check_user_quota against an in-memory user."""
+    connector = SimpleNamespace(get_user=lambda: user, _stale_usage_counters=set())
+    return MultiTenantConnector.check_user_quota(connector)
 
 
 def test_subscription_tiers():
     """Test subscription tier definitions."""
-    print(" Testing Subscription Tiers...")
-    
-    # Test tier values
-    assert SubscriptionTier.TRIAL.value == "trial"
-    assert SubscriptionTier.PRO.value == "pro"
-    assert SubscriptionTier.PLUS.value == "plus"
-    assert SubscriptionTier.TEAMS.value == "teams"
-    
-    print(" Subscription tiers defined correctly")
-    return True
+    assert TRIAL.value == "trial"
+    assert PRO.value == "pro"
+    assert PLUS.value == "plus"
+    assert TEAMS.value == "teams"
+
+    # Test tier ordering
+    assert [tier.rank for tier in SubscriptionTier] == [0, 1, 2, 3]
 
 
 def test_trial_period_calculation():
-    """Test trial period calculation logic."""
-    print(" Testing Trial Period Calculation...")
-    
-    # Test 7-day trial period using timezone-aware datetime
-    now = datetime.now(timezone.utc)
-    trial_end = now + timedelta(days=7)
-    
-    # Verify trial duration
-    duration = trial_end - now
-    assert duration.days == 7
-    assert duration.seconds >= 0
-    
-    print(f" Trial period: {duration.days} days, {duration.seconds // 3600} hours")
-    return True
-
-
-def test_quota_limits():
+    """Test that trial_ends_at_epoch is computed when the user model is built."""
+    aware_end = datetime(2030, 1, 8, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert make_user(trial_ends_at=aware_end).trial_ends_at_epoch == int(aware_end.timestamp())
+
+    # Naive timestamps are read as UTC
+    naive_end = datetime(2030, 1, 8, 12, 0)
+    assert make_user(trial_ends_at=naive_end).trial_ends_at_epoch == calendar.timegm(naive_end.timetuple())
+
+    assert make_user(tier=PRO).trial_ends_at_epoch is None
+
+
+def test_trial_epoch_not_serialized():
+    """Test that the precomputed epoch stays out of the API payload."""
+    user = make_user(trial_ends_at=datetime.now(timezone.utc) + timedelta(days=7))
+    assert "trial_ends_at_epoch" not in user.model_dump()
+    assert "trial_ends_at" in user.model_dump()
+
+
+@pytest.mark.parametrize("tier,requests,tokens", QUOTA_CASES)
+def test_quota_limits(tier, requests, tokens):
     """Test quota limits for each subscription tier."""
-    print(" Testing Quota Limits...")
-    
-    tier_limits = {
-        SubscriptionTier.TRIAL: {"requests": 120, "tokens": 50000},
-        SubscriptionTier.PRO: {"requests": 1000, "tokens": 1000000},
-        SubscriptionTier.PLUS: {"requests": 2500, "tokens": 2500000},
-        SubscriptionTier.TEAMS: {"requests": 5000, "tokens": 5000000}
-    }
-    
-    # Test limits are properly defined
-    for tier, limits in tier_limits.items():
-        assert "requests" in limits
-        assert "tokens" in limits
-        assert limits["requests"] > 0
-        assert limits["tokens"] > 0
-        print(f" {tier.value}: {limits['requests']} requests, {limits['tokens']:,} tokens")
-    
-    # Test tier progression
-    assert tier_limits[SubscriptionTier.PRO]["requests"] > tier_limits[SubscriptionTier.TRIAL]["requests"]
-    assert tier_limits[SubscriptionTier.PLUS]["requests"] > tier_limits[SubscriptionTier.PRO]["requests"]
-    assert tier_limits[SubscriptionTier.TEAMS]["requests"] > tier_limits[SubscriptionTier.PLUS]["requests"]
-    
-    print(" Quota limits properly defined and progressive")
-    return True
-
-
-def test_subscription_pricing():
+    assert TIER_LIMITS[tier.rank] == (requests, tokens)
+
+
+@pytest.mark.parametrize("lower,higher", TIER_STEPS)
+def test_quota_limits_progressive(lower, higher):
+    """Test that each tier allows more usage than the one below it."""
+    assert TIER_LIMITS[higher.rank] > TIER_LIMITS[lower.rank]
+
+
+@pytest.mark.parametrize("tier,cents,price,duration", PRICING_CASES)
+def test_subscription_pricing(tier, cents, price, duration):
     """Test subscription pricing model."""
-    print(" Testing Subscription Pricing...")
-    
-    pricing = {
-        SubscriptionTier.TRIAL: {"price": "Free", "duration": "7 days"},
-        SubscriptionTier.PRO: {"price": "$10/month", "duration": "Monthly"},
-        SubscriptionTier.PLUS: {"price": "$19/month", "duration": "Monthly"},
-        SubscriptionTier.TEAMS: {"price": "$49/month + $12/user", "duration": "Monthly"}
-    }
-    
-    for tier, details in pricing.items():
-        print(f" {tier.value}: {details['price']} ({details['duration']})")
-    
-    # Test pricing progression
-    assert pricing[SubscriptionTier.PRO]["price"] == "$10/month"
-    assert pricing[SubscriptionTier.PLUS]["price"] == "$19/month"
-    assert pricing[SubscriptionTier.TEAMS]["price"] == "$49/month + $12/user"
-    
-    print(" Pricing model properly defined")
-    return True
+    assert TIER_PRICES_CENTS[tier.rank] == cents
+    if cents:
+        assert price.startswith(f"${cents // 100}/month")
+        assert duration == "Monthly"
+    else:
+        assert price == "Free"
 
 
 def test_trial_expiration_logic():
-    """Test trial expiration logic."""
-    print(" Testing Trial Expiration Logic...")
-    
-    # Test expired trial using timezone-aware datetime
+    """Test that quota checks refuse expired trials and allow active ones."""
     now = datetime.now(timezone.utc)
-    expired_trial_end = now - timedelta(days=1)
-    is_expired = now > expired_trial_end
-    assert is_expired == True  # This should be True because now > expired_trial_end
-    
+
+    # Test expired trial
+    expired = check_quota(make_user(trial_ends_at=now - timedelta(days=1)))
+    assert expired["allowed"] is False
+    assert "expired" in expired["reason"]
+
     # Test active trial
-    active_trial_end = now + timedelta(days=2)
-    is_active = now < active_trial_end
-    assert is_active == True
-    
-    # Test trial with 1 day remaining
-    one_day_left = now + timedelta(days=1)
-    days_remaining = (one_day_left - now).days
-    assert days_remaining == 1
-    
-    print(" Trial expiration logic working correctly")
-    return True
-
-
-def test_subscription_features():
-    """Test subscription feature definitions."""
-    print(" Testing Subscription Features...")
-    
-    features = {
-        SubscriptionTier.TRIAL: [
-            "Basic agent functionality",
-            "Notion integration",
-            "Task management",
-            "7-day trial period"
-        ],
-        SubscriptionTier.PRO: [
-            "Full agent functionality",
-            "Advanced task management",
-            "Priority support",
-            "Usage analytics"
-        ],
-        SubscriptionTier.PLUS: [
-            "Everything in Pro",
-            "Advanced analytics",
-            "Custom integrations",
-            "API access"
-        ],
-        SubscriptionTier.TEAMS: [
-            "Everything in Plus",
-            "Team collaboration",
-            "Admin dashboard",
-            "Custom onboarding"
-        ]
-    }
-    
-    for tier, tier_features in features.items():
-        print(f" {tier.value}: {len(tier_features)} features")
-        assert len(tier_features) > 0
-    
-    # Test feature progression
-    assert len(features[SubscriptionTier.PRO]) >= len(features[SubscriptionTier.TRIAL])
-    assert len(features[SubscriptionTier.PLUS]) >= len(features[SubscriptionTier.PRO])
-    assert len(features[SubscriptionTier.TEAMS]) >= len(features[SubscriptionTier.PLUS])
-    
-    print(" Feature sets properly defined and progressive")
-    return True
-
-
-def test_subscription_upgrade_flow():
-    """Test subscription upgrade flow logic."""
-    print(" Testing Subscription Upgrade Flow...")
-    
-    # Test upgrade paths
-    upgrade_paths = {
-        SubscriptionTier.TRIAL: [SubscriptionTier.PRO, SubscriptionTier.PLUS, SubscriptionTier.TEAMS],
-        SubscriptionTier.PRO: [SubscriptionTier.PLUS, SubscriptionTier.TEAMS],
-        SubscriptionTier.PLUS: [SubscriptionTier.TEAMS],
-        SubscriptionTier.TEAMS: []  # No upgrades from Teams
-    }
-    
-    for current_tier, available_upgrades in upgrade_paths.items():
-        print(f" {current_tier.value} can upgrade to: {[t.value for t in available_upgrades]}")
-        
-        # Verify no downgrades are possible
-        for upgrade_tier in available_upgrades:
-            assert upgrade_tier.value != current_tier.value
-    
-    print(" Upgrade flow properly defined")
-    return True
+    active_end = now + timedelta(days=2)
+    active = check_quota(make_user(trial_ends_at=active_end))
+    assert active["allowed"] is True
+    assert active["trial_expires"] == active_end
+    assert active["remaining_requests"] == TIER_LIMITS[TRIAL.rank][0]
+
+    # Test expired trial end stored without a timezone (read as UTC)
+    naive_expired = now.replace(tzinfo=None) - timedelta(hours=1)
+    assert check_quota(make_user(trial_ends_at=naive_expired))["allowed"] is False
+
+
+@pytest.mark.parametrize("lower,higher", TIER_STEPS)
+def test_subscription_features(lower, higher):
+    """Test that feature sets are defined and progressive."""
+    assert len(FEATURES[lower]) > 0
+    assert len(FEATURES[higher]) >= len(FEATURES[lower])
+
+
+@pytest.mark.parametrize("current_tier", list(SubscriptionTier))
+def test_subscription_upgrade_flow(current_tier):
+    """Test that upgrades only move to higher tiers."""
+    assert UPGRADE_PATHS[current_tier] == [tier for tier in SubscriptionTier if tier.rank > current_tier.rank]
 
 
 def main():
     """Run all subscription model tests."""
     print(" Testing New Subscription Model Implementation")
     print("=" * 60)
-    
-    tests = [
-        test_subscription_tiers,
-        test_trial_period_calculation,
-        test_quota_limits,
-        test_subscription_pricing,
-        test_trial_expiration_logic,
-        test_subscription_features,
-        test_subscription_upgrade_flow
-    ]
-    
-    passed = 0
-    total = len(tests)
-    
-    for test in tests:
-        try:
-            if test():
-                passed += 1
-        except Exception as e:
-            print(f" {test.__name__}: Failed with exception - {str(e)}")
-    
-    print("\n" + "=" * 60)
-    print(f" Test Summary: {passed}/{total} tests passed")
-    
-    if passed == total:
+
+    exit_code = pytest.main([__file__, "-q"])
+
+    if exit_code == 0:
         print("\n All subscription model tests passed!")
         print("\n New Subscription Model Summary:")
         print("   • 7-day Free Trial (120 requests, 50k tokens)")
@@ -229,9 +191,9 @@ def main():
         print("\n Subscription model is ready for implementation!")
     else:
         print("\n Some subscription model tests failed.")
-    
-    return passed == total
+
+    return exit_code == 0
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(0 if main() else 1)
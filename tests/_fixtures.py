@@ -0,0 +1,65 @@
+"""
+Shared, lazily built resources for the test and inspection scripts.
+"""
+
+import contextlib
+import contextvars
+import functools
+import io
+import sys
+
+@functools.lru_cache(maxsize=1)
+def get_rag_engine():
+    """Return the process-wide RAGEngine, connecting to ChromaDB on first use."""
+    from src.tools.rag_engine import RAGEngine
+    return RAGEngine()
+
+# Buffer that print() in the current context writes to; None means the real stdout
+_output_buffer = contextvars.ContextVar("output_buffer", default=None)
+
+class _ContextOutput(io.TextIOBase):
+    """stdout stand-in that sends writes to the current context's buffer, if it has one.
+
+    asyncio gives each task its own copy of the context, so concurrent tests
+    never write into each other's buffers.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buffer = _output_buffer.get()
+        return (self._stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+@contextlib.contextmanager
+def _print_to(buffer):
+    """Send this context's printed output to ``buffer`` until the block exits."""
+    if not isinstance(sys.stdout, _ContextOutput):
+        sys.stdout = _ContextOutput(sys.stdout)
+    token = _output_buffer.set(buffer)
+    try:
+        yield
+    finally:
+        _output_buffer.reset(token)
+
+async def capture_output(coro):
+    """Await a coroutine and return what it printed, kept apart from other tasks' output."""
+    buffer = io.StringIO()
+    with _print_to(buffer):
+        await coro
+    return buffer.getvalue()
+
+def buffered_output(test):
+    """Collect an async test's printed report and write it to stdout in one call when it returns."""
+    @functools.wraps(test)
+    async def wrapper(*args, **kwargs):
+        buffer = io.StringIO()
+        try:
+            with _print_to(buffer):
+                return await test(*args, **kwargs)
+        finally:
+            sys.stdout.write(buffer.getvalue())
+    return wrapper
@@ -0,0 +1,93 @@
+"""
+On-disk response cache for the LLM debug scripts.
+
+Deterministic probes return the same text on every run, so repeat runs are
+served from ~/.cache/nova/llm instead of calling the API again.
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import functools
+from pathlib import Path
+from types import SimpleNamespace
+
+CACHE_DIR = Path.home() / ".cache" / "nova" / "llm"
+
+def _temperature(model):
+    """Explicit sampling temperature of a GenerativeModel, or None when left at the default."""
+    config = getattr(model, "_generation_config", None) or getattr(model, "generation_config", None) or {}
+    if isinstance(config, dict):
+        return config.get("temperature")
+    return getattr(config, "temperature", None)
+
+def _cache_path(model, messages, temperature):
+    """Content-addressed cache file for one request."""
+    payload = json.dumps({
+        "model": model.model_name,
+        "messages": messages,
+        "temperature": temperature
+    }, sort_keys=True, default=str)
+    return CACHE_DIR / f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.json"
+
+def _load(path, ttl):
+    """Rebuild a cached response with the attributes the scripts read, or None on a miss."""
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry["created"] > ttl:
+        return None
+    part = SimpleNamespace(text=entry["text"])
+    candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]))
+    return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+def _store(path, response):
+    """Write a response to the cache; blocked or empty responses are not kept."""
+    if not response.candidates:
+        return
+    try:
+        text = response.candidates[0].content.parts[0].text
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"created": time.time(), "text": text}), encoding="utf-8")
+    except (OSError, IndexError, ValueError) as e:
+        print(f"Could not cache LLM response: {e}")
+
+def lru_cached_llm(ttl=3600):
+    """Cache a `generate(model, messages)` function (sync or async) on disk for `ttl` seconds.
+
+    Only requests whose model sets temperature=0 explicitly are cached; the model
+    default samples, so a replayed response would hide run-to-run differences.
+    """
+    def decorator(generate):
+        def lookup(model, messages):
+            temperature = _temperature(model)
+            if temperature != 0:
+                return None, None
+            path = _cache_path(model, messages, temperature)
+            return path, _load(path, ttl)
+
+        if asyncio.iscoroutinefunction(generate):
+            @functools.wraps(generate)
+            async def async_wrapper(model, messages):
+                path, cached = lookup(model, messages)
+                if cached is not None:
+                    return cached
+                response = await generate(model, messages)
+                if path is not None:
+                    _store(path, response)
+                return response
+            return async_wrapper
+
+        @functools.wraps(generate)
+        def wrapper(model, messages):
+            path, cached = lookup(model, messages)
+            if cached is not None:
+                return cached
+            response = generate(model, messages)
+            if path is not None:
+                _store(path, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,47 @@
+"""
+Flat LangGraph checks generated by scripts/gen_validator.py from tests/validate_langgraph.py.
+Do not edit; regenerate after changing the required fields, nodes or tools.
+"""
+
+from src.agent import AgentState, TOOLS, graph
+
+CHECK_COUNT = 16
+
+def run_checks():
+    """Return a description of every failed check."""
+    failed = []
+    annotations = AgentState.__annotations__
+    nodes = graph.nodes
+    if 'context' not in annotations:
+        failed.append("AgentState field 'context'")
+    if 'error' not in annotations:
+        failed.append("AgentState field 'error'")
+    if 'goal' not in annotations:
+        failed.append("AgentState field 'goal'")
+    if 'messages' not in annotations:
+        failed.append("AgentState field 'messages'")
+    if 'next_action' not in annotations:
+        failed.append("AgentState field 'next_action'")
+    if 'tool_calls' not in annotations:
+        failed.append("AgentState field 'tool_calls'")
+    if 'tool_results' not in annotations:
+        failed.append("AgentState field 'tool_results'")
+    if 'action' not in nodes:
+        failed.append("graph node 'action'")
+    if 'perception' not in nodes:
+        failed.append("graph node 'perception'")
+    if 'reasoning' not in nodes:
+        failed.append("graph node 'reasoning'")
+    if 'save_state' not in nodes:
+        failed.append("graph node 'save_state'")
+    if 'create_task' not in TOOLS:
+        failed.append("tool mapping 'create_task'")
+    if 'get_routines' not in TOOLS:
+        failed.append("tool mapping 'get_routines'")
+    if 'search_tasks' not in TOOLS:
+        failed.append("tool mapping 'search_tasks'")
+    if 'send_notification' not in TOOLS:
+        failed.append("tool mapping 'send_notification'")
+    if 'update_task' not in TOOLS:
+        failed.append("tool mapping 'update_task'")
+    return failed
@@ -10,36 +10,267 @@ This script analyzes agent execution logs to provide insights into:
 - State transitions
 """
 
-import json
+import argparse
 import re
 import os
-from datetime import datetime
-from collections import defaultdict, Counter
-from typing import Dict, List, Any, Optional
-import matplotlib.pyplot as plt
-import pandas as pd
+import multiprocessing
+from datetime import datetime, date
+from pathlib import Path
+from collections import Counter, deque
+from typing import Dict, List, Any, Optional, Tuple
+
+# Log line layout: "<timestamp> - <logger> - <level> - <message>"
+_LOG_RE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (\w+) - (\w+) - (.+)')
+_ACTION_RE = re.compile(r'Action: Executing (\w+)')
+_LOOP_COUNT_RE = re.compile(r'loop_count.*?(\d+)')
+_ACTION_PREFIX = 'Action: Executing '
+_ERROR_TYPE_RE = re.compile(r'(LLM response has no candidates)|(Recursion limit)|(coroutine object)|(JSONDecodeError)')
+_ERROR_TYPES = (None, 'llm_no_candidates', 'recursion_limit', 'async_error', 'json_parse_error')  # by group index
+_FLOW_RE = re.compile(
+    r'(Starting LangGraph execution)|(Perception: Gathering context)|(Reasoning: Determining next action)'
+    r'|(Action: Executing)|(Agent ending|Error in LangGraph execution)'
+)
+_FLOW_STEPS = (None, 'start', 'perception', 'reasoning', 'action', 'end')  # by group index
+_READ_BUFFER_SIZE = 1 << 20
+_TOOL_NAMES = ('search_tasks', 'get_routines', 'create_task', 'update_task', 'send_notification')
+
+
+def _extract_action_name(message: str) -> Optional[str]:
+    """Return the action name after 'Action: Executing ', falling back to the regex for unusual shapes."""
+    idx = message.find(_ACTION_PREFIX)
+    if idx < 0:
+        return None
+    tail = message[idx + len(_ACTION_PREFIX):]
+    if tail and not tail[0].isspace():
+        name = tail.split(None, 1)[0]
+        if name.isidentifier():
+            return name
+    action_match = _ACTION_RE.search(message)
+    return action_match.group(1) if action_match else None
+
+def _timestamp_ms(timestamp: str) -> int:
+    """Milliseconds since 0001-01-01 for a fixed-width 'YYYY-MM-DD HH:MM:SS,mmm' log timestamp."""
+    days = date(int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10])).toordinal()
+    seconds = days * 86400 + int(timestamp[11:13]) * 3600 + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+    return seconds * 1000 + int(timestamp[20:23])
+
+def _parse_log_line(log_line: str) -> Optional[Dict[str, Any]]:
+    """Split a log line into timestamp, logger, level and message (None if it doesn't match)."""
+    # Cheap separator check rules out continuation lines before the regex runs
+    if ' - ' not in log_line:
+        return None
+    match = _LOG_RE.match(log_line)
+    
+    if match:
+        timestamp, logger_name, level, message = match.groups()
+        return {
+            'timestamp': timestamp,
+            'logger': logger_name,
+            'level': level,
+            'message': message
+        }
+    return None
+
+def _line_aligned_ranges(path: str, jobs: int) -> List[Tuple[int, int]]:
+    """Split a file into up to ``jobs`` byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, jobs):
+            f.seek(size * i // jobs)
+            f.readline()  # move to the start of the next full line
+            offsets.append(f.tell())
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+def _iter_byte_range(path: str, start: int, end: int):
+    """Yield the lines in ``[start, end)`` of a file, decoding and splitting it in 1 MB chunks."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        tail = b''
+        while remaining > 0:
+            chunk = f.read(min(_READ_BUFFER_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            data = tail + chunk
+            cut = data.rfind(b'\n')
+            if cut < 0:
+                tail = data
+                continue
+            tail = data[cut + 1:]  # partial last line, completed by the next chunk
+            yield from data[:cut].decode('utf-8').split('\n')
+        if tail:
+            yield tail.decode('utf-8')
+
+def _scan_lines(lines) -> Dict[str, Any]:
+    """Per-line pass: counters plus the ordered flow steps of notion_agent entries.
+    
+    Everything here is independent per line, so ranges of a file can be scanned separately
+    and merged; the order-dependent flow state machine runs later in ``_replay_steps``.
+    """
+    total_entries = 0
+    tool_usage = Counter()
+    tool_errors = Counter()
+    total_errors = 0
+    recent_errors = deque(maxlen=10)  # only the last 10 lines are kept for the report
+    error_types = Counter()
+    loop_counts = []
+    steps = []  # (step, flow label, timestamp in ms for start/end steps)
+    
+    for log in lines:
+        if not log:
+            continue
+        # Log lines rarely carry edge whitespace, so only strip when they do
+        if log[0].isspace() or log[-1].isspace():
+            log = log.strip()
+            if not log:
+                continue
+        total_entries += 1
+        
+        # Raw-line checks: tool usage and errors look at every line
+        if 'Action: Executing' in log:
+            action_name = _extract_action_name(log)
+            if action_name:
+                tool_usage[action_name] += 1
+        
+        if 'ERROR' in log:
+            total_errors += 1
+            recent_errors.append(log)
+            tool_errors.update(tool for tool in _TOOL_NAMES if tool in log)
+        
+            # Categorize errors by the first known marker in the line
+            error_match = _ERROR_TYPE_RE.search(log)
+            error_types[_ERROR_TYPES[error_match.lastindex] if error_match else 'other'] += 1
+        
+        # Parsed checks: flow and timing only follow notion_agent entries
+        entry = _parse_log_line(log)
+        if not entry or entry['logger'] != 'notion_agent':
+            continue
+        message = entry['message']
+        
+        # Classify the step once; node transitions, flows and timing all key off it
+        flow_match = _FLOW_RE.search(message)
+        if flow_match:
+            step = _FLOW_STEPS[flow_match.lastindex]
+            if step == 'action':
+                action_name = _extract_action_name(message)
+                steps.append((step, f"action_{action_name}" if action_name else 'action', None))
+            elif step == 'start' or step == 'end':
+                steps.append((step, step, _timestamp_ms(entry['timestamp'])))
+            else:
+                steps.append((step, step, None))
+        
+        # Loop counts
+        if 'loop_count' in message:
+            match = _LOOP_COUNT_RE.search(message)
+            if match:
+                loop_counts.append(int(match.group(1)))
+    
+    return {
+        'total_entries': total_entries,
+        'tool_usage': tool_usage,
+        'tool_errors': tool_errors,
+        'total_errors': total_errors,
+        'recent_errors': recent_errors,
+        'error_types': error_types,
+        'loop_counts': loop_counts,
+        'steps': steps,
+    }
+
+def _scan_byte_range(args: Tuple[str, int, int]) -> Dict[str, Any]:
+    """Pool worker: run the per-line pass over one byte range of the log file."""
+    path, start, end = args
+    return _scan_lines(_iter_byte_range(path, start, end))
+
+def _replay_steps(steps: List[Tuple[str, str, Optional[int]]]) -> Dict[str, Any]:
+    """Run the node-transition, flow and timing state machine over the ordered flow steps."""
+    total_executions = 0
+    node_transitions = []
+    current_node = None
+    flows = []
+    current_flow = []
+    execution_times = []
+    start_time = None
+    
+    for step, label, timestamp_ms in steps:
+        if step == 'start':
+            total_executions += 1
+            if current_flow:
+                flows.append(current_flow)
+            current_flow = ['start']
+            start_time = timestamp_ms
+        elif step == 'end':
+            current_flow.append('end')
+            flows.append(current_flow)
+            current_flow = []
+            if start_time:
+                execution_times.append((timestamp_ms - start_time) / 1000)
+                start_time = None
+        else:
+            # perception, reasoning or action
+            if step != 'perception' and current_node:
+                node_transitions.append((current_node, step))
+            current_node = step
+            current_flow.append(label)
+    
+    if current_flow:
+        flows.append(current_flow)
+    
+    return {
+        'total_executions': total_executions,
+        'node_transitions': node_transitions,
+        'execution_flows': flows,
+        'execution_times': execution_times,
+    }
+
+def _merge_scans(partials) -> Dict[str, Any]:
+    """Combine per-range scans (in file order) and replay the flow steps across them."""
+    merged = {
+        'total_entries': 0,
+        'tool_usage': Counter(),
+        'tool_errors': Counter(),
+        'total_errors': 0,
+        'recent_errors': deque(maxlen=10),
+        'error_types': Counter(),
+        'loop_counts': [],
+    }
+    steps = []
+    for partial in partials:
+        merged['total_entries'] += partial['total_entries']
+        merged['tool_usage'].update(partial['tool_usage'])
+        merged['tool_errors'].update(partial['tool_errors'])
+        merged['total_errors'] += partial['total_errors']
+        merged['recent_errors'].extend(partial['recent_errors'])
+        merged['error_types'].update(partial['error_types'])
+        merged['loop_counts'].extend(partial['loop_counts'])
+        steps.extend(partial['steps'])
+    
+    merged['recent_errors'] = list(merged['recent_errors'])
+    merged.update(_replay_steps(steps))
+    return merged
 
 class AgentLogAnalyzer:
     """Analyzes agent execution logs for insights and performance metrics."""
     
-    def __init__(self, log_file_path: str = "agent.log"):
+    def __init__(self, log_file_path: str = "agent.log", jobs: int = 1):
         self.log_file_path = log_file_path
-        self.logs = []
+        self.jobs = max(1, jobs)
+        self.total_entries = 0
         self.analysis_results = {}
+        self._scan = None
         
     def load_logs(self) -> bool:
-        """Load and parse agent logs."""
+        """Stream the agent log file through the analysis pass."""
         if not os.path.exists(self.log_file_path):
             print(f"Log file not found: {self.log_file_path}")
             return False
             
         try:
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        self.logs.append(line)
-            print(f"Loaded {len(self.logs)} log entries")
+            self._scan = None
+            self._scan_all()
+            print(f"Loaded {self.total_entries} log entries")
             return True
         except Exception as e:
             print(f"Error loading logs: {e}")
@@ -47,105 +278,40 @@ class AgentLogAnalyzer:
     
     def parse_log_entry(self, log_line: str) -> Optional[Dict[str, Any]]:
         """Parse a single log entry."""
-        # Pattern to match log entries
-        pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (\w+) - (\w+) - (.+)'
-        match = re.match(pattern, log_line)
-        
-        if match:
-            timestamp, logger_name, level, message = match.groups()
-            return {
-                'timestamp': timestamp,
-                'logger': logger_name,
-                'level': level,
-                'message': message,
-                'datetime': datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S,%f')
-            }
-        return None
+        return _parse_log_line(log_line)
+    
+    def _scan_all(self) -> Dict[str, Any]:
+        """Stream the log file once, feeding every analysis from the same pass."""
+        if self._scan is not None:
+            return self._scan
+        
+        ranges = _line_aligned_ranges(self.log_file_path, self.jobs)
+        if len(ranges) > 1:
+            # Ranges are scanned in parallel; imap keeps them in file order for the flow replay
+            with multiprocessing.Pool(len(ranges)) as pool:
+                partials = list(pool.imap(_scan_byte_range, [(self.log_file_path, start, end) for start, end in ranges]))
+        else:
+            partials = [_scan_byte_range((self.log_file_path, start, end)) for start, end in ranges]
+        
+        self._scan = _merge_scans(partials)
+        self.total_entries = self._scan['total_entries']
+        return self._scan
     
     def analyze_execution_patterns(self) -> Dict[str, Any]:
         """Analyze execution patterns and flow."""
-        parsed_logs = [self.parse_log_entry(log) for log in self.logs if self.parse_log_entry(log)]
-        
-        # Filter for notion_agent logs
-        agent_logs = [log for log in parsed_logs if log['logger'] == 'notion_agent']
-        
-        # Analyze node transitions
-        node_transitions = []
-        current_node = None
-        
-        for log in agent_logs:
-            message = log['message']
-            if 'Perception: Gathering context' in message:
-                current_node = 'perception'
-            elif 'Reasoning: Determining next action' in message:
-                if current_node:
-                    node_transitions.append((current_node, 'reasoning'))
-                current_node = 'reasoning'
-            elif 'Action: Executing' in message:
-                if current_node:
-                    node_transitions.append((current_node, 'action'))
-                current_node = 'action'
-        
-        # Count transitions
-        transition_counts = Counter(node_transitions)
+        scan = self._scan_all()
         
         return {
-            'total_executions': len([log for log in agent_logs if 'Starting LangGraph execution' in log['message']]),
-            'node_transitions': dict(transition_counts),
-            'execution_flows': self._extract_execution_flows(agent_logs)
+            'total_executions': scan['total_executions'],
+            'node_transitions': dict(Counter(scan['node_transitions'])),
+            'execution_flows': scan['execution_flows']
         }
     
-    def _extract_execution_flows(self, agent_logs: List[Dict[str, Any]]) -> List[List[str]]:
-        """Extract complete execution flows."""
-        flows = []
-        current_flow = []
-        
-        for log in agent_logs:
-            message = log['message']
-            
-            if 'Starting LangGraph execution' in message:
-                if current_flow:
-                    flows.append(current_flow)
-                current_flow = ['start']
-            elif 'Perception: Gathering context' in message:
-                current_flow.append('perception')
-            elif 'Reasoning: Determining next action' in message:
-                current_flow.append('reasoning')
-            elif 'Action: Executing' in message:
-                # Extract action name
-                action_match = re.search(r'Action: Executing (\w+)', message)
-                if action_match:
-                    current_flow.append(f"action_{action_match.group(1)}")
-                else:
-                    current_flow.append('action')
-            elif 'Agent ending' in message or 'Error in LangGraph execution' in message:
-                current_flow.append('end')
-                flows.append(current_flow)
-                current_flow = []
-        
-        if current_flow:
-            flows.append(current_flow)
-        
-        return flows
-    
     def analyze_tool_usage(self) -> Dict[str, Any]:
         """Analyze tool usage patterns."""
-        tool_usage = defaultdict(int)
-        tool_errors = defaultdict(int)
-        
-        for log in self.logs:
-            # Count tool executions
-            if 'Action: Executing' in log:
-                action_match = re.search(r'Action: Executing (\w+)', log)
-                if action_match:
-                    tool_name = action_match.group(1)
-                    tool_usage[tool_name] += 1
-            
-            # Count tool errors
-            if 'ERROR' in log and any(tool in log for tool in ['search_tasks', 'get_routines', 'create_task', 'update_task', 'send_notification']):
-                for tool in ['search_tasks', 'get_routines', 'create_task', 'update_task', 'send_notification']:
-                    if tool in log:
-                        tool_errors[tool] += 1
+        scan = self._scan_all()
+        tool_usage = scan['tool_usage']
+        tool_errors = scan['tool_errors']
         
         return {
             'tool_usage': dict(tool_usage),
@@ -163,29 +329,9 @@ class AgentLogAnalyzer:
     
     def analyze_performance(self) -> Dict[str, Any]:
         """Analyze performance metrics."""
-        parsed_logs = [self.parse_log_entry(log) for log in self.logs if self.parse_log_entry(log)]
-        agent_logs = [log for log in parsed_logs if log['logger'] == 'notion_agent']
-        
-        # Calculate execution times
-        execution_times = []
-        start_time = None
-        
-        for log in agent_logs:
-            if 'Starting LangGraph execution' in log['message']:
-                start_time = log['datetime']
-            elif ('Agent ending' in log['message'] or 'Error in LangGraph execution' in log['message']) and start_time:
-                end_time = log['datetime']
-                execution_time = (end_time - start_time).total_seconds()
-                execution_times.append(execution_time)
-                start_time = None
-        
-        # Calculate loop counts
-        loop_counts = []
-        for log in agent_logs:
-            if 'loop_count' in log['message']:
-                match = re.search(r'loop_count.*?(\d+)', log['message'])
-                if match:
-                    loop_counts.append(int(match.group(1)))
+        scan = self._scan_all()
+        execution_times = scan['execution_times']
+        loop_counts = scan['loop_counts']
         
         return {
             'total_executions': len(execution_times),
@@ -198,28 +344,12 @@ class AgentLogAnalyzer:
     
     def analyze_errors(self) -> Dict[str, Any]:
         """Analyze error patterns."""
-        errors = []
-        error_types = Counter()
-        
-        for log in self.logs:
-            if 'ERROR' in log:
-                errors.append(log)
-                # Categorize errors
-                if 'LLM response has no candidates' in log:
-                    error_types['llm_no_candidates'] += 1
-                elif 'Recursion limit' in log:
-                    error_types['recursion_limit'] += 1
-                elif 'coroutine object' in log:
-                    error_types['async_error'] += 1
-                elif 'JSONDecodeError' in log:
-                    error_types['json_parse_error'] += 1
-                else:
-                    error_types['other'] += 1
+        scan = self._scan_all()
         
         return {
-            'total_errors': len(errors),
-            'error_types': dict(error_types),
-            'recent_errors': errors[-10:] if errors else []  # Last 10 errors
+            'total_errors': scan['total_errors'],
+            'error_types': dict(scan['error_types']),
+            'recent_errors': scan['recent_errors']  # Last 10 errors
         }
     
     def generate_report(self) -> str:
@@ -240,7 +370,7 @@ class AgentLogAnalyzer:
         report.append("=" * 60)
         report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         report.append(f"Log file: {self.log_file_path}")
-        report.append(f"Total log entries: {len(self.logs)}")
+        report.append(f"Total log entries: {self.total_entries}")
         report.append("")
         
         # Execution Patterns
@@ -317,24 +447,24 @@ class AgentLogAnalyzer:
 
 def main():
     """Main function to run the analysis."""
+    parser = argparse.ArgumentParser(description="Analyze agent execution logs")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for the scan (default 1; sequential is usually fastest for small logs)")
+    args = parser.parse_args()
+    
     print("Agent Log Analyzer")
     print("=" * 40)
     
-    # Check for log files
-    log_files = ["agent.log", "logs/agent.log"]
-    log_file = None
-    
-    for file_path in log_files:
-        if os.path.exists(file_path):
-            log_file = file_path
-            break
+    # Check for log files, preferring the most recently written one
+    candidates = [*Path('.').glob('agent*.log'), *Path('logs').glob('agent*.log')]
+    log_file = max(candidates, key=lambda p: p.stat().st_mtime, default=None)
     
     if not log_file:
         print("No log files found. Please ensure agent.log exists.")
         return
     
     # Create analyzer and run analysis
-    analyzer = AgentLogAnalyzer(log_file)
+    analyzer = AgentLogAnalyzer(str(log_file), jobs=args.jobs)
     
     # Generate and display report
     report = analyzer.generate_report()
@@ -0,0 +1,12 @@
+"""
+Shared pytest fixtures for the tests/ modules.
+"""
+import pytest
+
+
+@pytest.fixture(scope="session")
+def rag_engine():
+    """Process-wide RAGEngine, built on first use and reused by every test in the session."""
+    # Imported lazily so collecting tests that never use the engine stays cheap
+    from _fixtures import get_rag_engine
+    return get_rag_engine()
@@ -20,6 +20,43 @@ import google.generativeai as genai
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+
+def extract_json(response_text: str):
+    """Decode the JSON object starting at the first '{' (None if there is none); trailing text is ignored."""
+    json_start = response_text.find('{')
+    if json_start == -1:
+        return None
+    parsed, _ = _JSON_DECODER.raw_decode(response_text, json_start)
+    return parsed
+
+def build_context_parts(state, current_time: str, include_routines: bool = True):
+    """Build the reasoning context lines exactly like the agent does."""
+    context_parts = [
+        f"Current time: {current_time}",
+        f"Work hours: {state['context']['work_hours']}"
+    ]
+    
+    # Add tasks context
+    if state.get("search_results", {}).get("success"):
+        tasks = state["search_results"]["tasks"]
+        context_parts.append(f"Available tasks: {len(tasks)}")
+        context_parts.append("Task details:")
+        for i, task in enumerate(tasks[:3], 1):
+            metadata = task.get("metadata", {})
+            context_parts.append(f"   {i}. {metadata.get('title', 'Unknown')} - {metadata.get('status', 'Unknown')}")
+    
+    # Add routines context
+    if include_routines and state.get("routine_results", {}).get("success"):
+        routines = state["routine_results"]["routines"]
+        context_parts.append(f"Available routines: {len(routines)}")
+        context_parts.append("Routine details:")
+        for i, routine in enumerate(routines[:3], 1):
+            metadata = routine.get("metadata", {})
+            context_parts.append(f"   {i}. {metadata.get('title', 'Unknown')} - {metadata.get('category', 'Unknown')}")
+    
+    return context_parts
+
 def test_agent_reasoning_node():
     """Test the exact reasoning node logic from the agent."""
     
@@ -82,31 +119,7 @@ def test_agent_reasoning_node():
         system_prompt = SYSTEM_PROMPT
         
         # Build context string exactly like the agent does
-        context_parts = []
-        context_parts.append(f"Current time: {state['context']['current_time']}")
-        context_parts.append(f"Work hours: {state['context']['work_hours']}")
-        
-        # Add tasks context
-        if state.get("search_results", {}).get("success"):
-            tasks = state["search_results"]["tasks"]
-            context_parts.append(f"Available tasks: {len(tasks)}")
-            context_parts.append("Task details:")
-            for i, task in enumerate(tasks[:3], 1):
-                metadata = task.get("metadata", {})
-                title = metadata.get("title", "Unknown")
-                status = metadata.get("status", "Unknown")
-                context_parts.append(f"   {i}. {title} - {status}")
-        
-        # Add routines context
-        if state.get("routine_results", {}).get("success"):
-            routines = state["routine_results"]["routines"]
-            context_parts.append(f"Available routines: {len(routines)}")
-            context_parts.append("Routine details:")
-            for i, routine in enumerate(routines[:3], 1):
-                metadata = routine.get("metadata", {})
-                title = metadata.get("title", "Unknown")
-                category = metadata.get("category", "Unknown")
-                context_parts.append(f"   {i}. {title} - {category}")
+        context_parts = build_context_parts(state, state['context']['current_time'])
         
         context_str = "\n".join(context_parts)
         
@@ -131,11 +144,8 @@ def test_agent_reasoning_node():
             
             # Try to parse JSON
             try:
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    json_str = response_text[json_start:json_end]
-                    parsed = json.loads(json_str)
+                parsed = extract_json(response_text)
+                if parsed is not None:
                     print(f" JSON parsed successfully")
                     print(f"Action tool: {parsed.get('action', {}).get('tool', 'unknown')}")
                     
@@ -167,21 +177,8 @@ def test_agent_reasoning_node():
         # Update state for second call
         state["search_results"]["tasks"] = state["search_results"]["tasks"][:1]  # Reduce tasks
         
-        # Build updated context
-        context_parts = []
-        context_parts.append(f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        context_parts.append(f"Work hours: {state['context']['work_hours']}")
-        
-        # Add updated tasks context
-        if state.get("search_results", {}).get("success"):
-            tasks = state["search_results"]["tasks"]
-            context_parts.append(f"Available tasks: {len(tasks)}")
-            context_parts.append("Task details:")
-            for i, task in enumerate(tasks[:3], 1):
-                metadata = task.get("metadata", {})
-                title = metadata.get("title", "Unknown")
-                status = metadata.get("status", "Unknown")
-                context_parts.append(f"   {i}. {title} - {status}")
+        # Build updated context (tasks only)
+        context_parts = build_context_parts(state, datetime.now().strftime('%Y-%m-%d %H:%M'), include_routines=False)
         
         context_str = "\n".join(context_parts)
         
@@ -207,11 +204,8 @@ def test_agent_reasoning_node():
             
             # Try to parse JSON
             try:
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    json_str = response_text[json_start:json_end]
-                    parsed = json.loads(json_str)
+                parsed = extract_json(response_text)
+                if parsed is not None:
                     print(f" JSON parsed successfully")
                     print(f"Action tool: {parsed.get('action', {}).get('tool', 'unknown')}")
                 else:
@@ -13,12 +13,22 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.config import get_settings
+from src.prompts.system_prompt import SYSTEM_PROMPT
 import google.generativeai as genai
+from _llm_cache import lru_cached_llm
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Byte-identical prompt prefix shared by every call, so provider-side prefix caching can hit
+STATIC_PREFIX = SYSTEM_PROMPT + "\n\n"
+
+@lru_cached_llm(ttl=3600)
+def generate(model, messages):
+    """Cached generate_content; repeat runs of deterministic probes skip the API."""
+    return model.generate_content(messages)
+
 def test_agent_message_format():
     """Test the exact message format that the agent uses."""
     
@@ -29,44 +39,14 @@ def test_agent_message_format():
     
     print(f"Testing with model: {settings.gemini_model}")
     
+    # One timestamp for the whole run, kept out of the static prompt prefix
+    now_str = datetime.now().strftime('%Y-%m-%d %H:%M')
+    
     # Test 1: First call (no message history)
     print("\n=== Test 1: First Call (No History) ===")
     try:
-        system_prompt = """
-You are an autonomous AI agent that helps manage and schedule tasks in Notion.
-Your goal is to intelligently prioritize and schedule tasks based on their urgency,
-importance, dependencies, and user preferences.
-
-## IMPORTANT: You must respond with structured JSON
-You must always respond with a JSON object in this exact format:
-
-```json
-{
-  "reasoning": "Your reasoning about what needs to be done",
-  "action": {
-    "tool": "tool_name",
-    "parameters": {
-      "param1": "value1",
-      "param2": "value2"
-    }
-  },
-  "confidence": 0.95
-}
-```
-
-## Available Tools:
-- `search_tasks`: Search for tasks with query parameter
-- `update_task`: Update task properties with task_id and properties parameters
-- `create_task`: Create new task with title, status, priority, due_date parameters
-- `send_notification`: Send notification with message and priority parameters
-- `get_routines`: Get user routines (no parameters needed)
-- `end`: End the current session (no parameters needed)
-
-Now, analyze the current context and determine the best course of action.
-"""
-        
         context_str = f"""
-Current time: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+Current time: {now_str}
 
 Available tasks: 3
 Task details:
@@ -89,19 +69,18 @@ Work hours: 10:00 to 02:00
 Previous actions completed successfully.
 """
         
-        user_message = f"{system_prompt}\n\n{context_str}"
-        
+        # Static prompt and dynamic context go in separate parts so the prefix stays byte-identical
         messages = [{
             "role": "user",
-            "parts": [user_message]
+            "parts": [STATIC_PREFIX, context_str]
         }]
         
         print(f"Message count: {len(messages)}")
         print(f"First message role: {messages[0]['role']}")
         print(f"First message parts count: {len(messages[0]['parts'])}")
-        print(f"First message content length: {len(messages[0]['parts'][0])}")
+        print(f"First message content length: {sum(len(part) for part in messages[0]['parts'])}")
         
-        response = model.generate_content(messages)
+        response = generate(model, messages)
         print(f"Response candidates: {len(response.candidates)}")
         if response.candidates:
             response_text = response.candidates[0].content.parts[0].text
@@ -119,15 +98,15 @@ Previous actions completed successfully.
     # Test 2: Second call (with message history)
     print("\n=== Test 2: Second Call (With History) ===")
     try:
-        # Add the previous assistant message to history
-        messages.append({
+        # Continue the first exchange as a chat session
+        chat = model.start_chat(history=messages + [{
             "role": "model",
             "parts": [first_response]
-        })
+        }])
         
         # Add a new user message
         new_context = f"""
-Current time: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+Current time: {now_str}
 
 Available tasks: 2
 Task details:
@@ -146,17 +125,12 @@ Work hours: 10:00 to 02:00
 Previous actions completed successfully.
 """
         
-        new_user_message = f"{system_prompt}\n\n{new_context}"
-        messages.append({
-            "role": "user",
-            "parts": [new_user_message]
-        })
-        
-        print(f"Message count: {len(messages)}")
-        print(f"Message roles: {[msg['role'] for msg in messages]}")
-        print(f"Last message content length: {len(messages[-1]['parts'][0])}")
+        # The system prompt is already in the first turn, so only the new context is sent
+        print(f"History count: {len(chat.history)}")
+        print(f"History roles: {[content.role for content in chat.history]}")
+        print(f"New message content length: {len(new_context)}")
         
-        response = model.generate_content(messages)
+        response = chat.send_message(new_context)
         print(f"Response candidates: {len(response.candidates)}")
         if response.candidates:
             response_text = response.candidates[0].content.parts[0].text
@@ -185,7 +159,7 @@ Previous actions completed successfully.
             }
         ]
         
-        response = model.generate_content(test_messages)
+        response = generate(model, test_messages)
         print(f"Simple conversation - candidates: {len(response.candidates)}")
         if response.candidates:
             print(f" Simple conversation works: {response.candidates[0].content.parts[0].text}")
@@ -201,7 +175,7 @@ Previous actions completed successfully.
         problematic_messages = [{
             "role": "user",
             "parts": [f"""
-You are an AI agent. The current time is {datetime.now().strftime('%Y-%m-%d %H:%M')}.
+You are an AI agent. The current time is {now_str}.
 
 Available tasks: 3
 Task details:
@@ -222,7 +196,7 @@ Respond with JSON: {{"reasoning": "test", "action": {{"tool": "search_tasks", "p
 """]
         }]
         
-        response = model.generate_content(problematic_messages)
+        response = generate(model, problematic_messages)
         print(f"Problematic content - candidates: {len(response.candidates)}")
         if response.candidates:
             print(f" Problematic content works: {response.candidates[0].content.parts[0].text[:100]}...")
@@ -7,7 +7,11 @@ import os
 import sys
 import json
 import logging
+import traceback
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -19,60 +23,75 @@ from src.config import get_settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Test state similar to what the agent uses. Tests layer their overrides over it with ChainMap;
+# reasoning_node only assigns top-level keys, so its writes land in the test's own front map
+BASE_STATE = {
+    "goal": "daily_planning",
+    "context": {
+        "current_time": datetime.now().strftime('%Y-%m-%d %H:%M'),
+        "work_hours": "10:00 to 02:00",
+        "available_tasks": 3,
+        "available_routines": 2
+    },
+    "messages": [],
+    "search_results": {
+        "success": True,
+        "tasks": [
+            {
+                "id": "task1",
+                "metadata": {
+                    "title": "Todo 24/6",
+                    "status": "In Progress",
+                    "parent_id": "page_id_1"
+                }
+            },
+            {
+                "id": "task2", 
+                "metadata": {
+                    "title": "implementation day 1",
+                    "status": "In Progress",
+                    "parent_id": "page_id_2"
+                }
+            }
+        ]
+    },
+    "routine_results": {
+        "success": True,
+        "routines": [
+            {
+                "id": "routine1",
+                "metadata": {
+                    "title": "Morning Planning Session",
+                    "category": "Planning"
+                }
+            }
+        ]
+    }
+}
+READ_ONLY_STATE = MappingProxyType(BASE_STATE)
+
+FIELD_LABELS = {
+    "next_action": "Next action",
+    "current_query": "Current query",
+    "error": "Error"
+}
+
+def run_reasoning(state):
+    """Run reasoning_node, returning (result, error, formatted traceback)."""
+    try:
+        return reasoning_node(state), None, None
+    except Exception as e:
+        return None, e, traceback.format_exc()
+
 def test_reasoning_node():
     """Test the exact reasoning_node function from the agent."""
     
     print("Testing the exact reasoning_node function...")
     
-    # Create a test state similar to what the agent uses
-    state = {
-        "goal": "daily_planning",
-        "context": {
-            "current_time": datetime.now().strftime('%Y-%m-%d %H:%M'),
-            "work_hours": "10:00 to 02:00",
-            "available_tasks": 3,
-            "available_routines": 2
-        },
-        "messages": [],
-        "search_results": {
-            "success": True,
-            "tasks": [
-                {
-                    "id": "task1",
-                    "metadata": {
-                        "title": "Todo 24/6",
-                        "status": "In Progress",
-                        "parent_id": "page_id_1"
-                    }
-                },
-                {
-                    "id": "task2", 
-                    "metadata": {
-                        "title": "implementation day 1",
-                        "status": "In Progress",
-                        "parent_id": "page_id_2"
-                    }
-                }
-            ]
-        },
-        "routine_results": {
-            "success": True,
-            "routines": [
-                {
-                    "id": "routine1",
-                    "metadata": {
-                        "title": "Morning Planning Session",
-                        "category": "Planning"
-                    }
-                }
-            ]
-        }
-    }
-    
     # Test 1: First call to reasoning_node
     print("\n=== Test 1: First Call to reasoning_node ===")
     try:
-        result = reasoning_node(state)
+        result = reasoning_node(ChainMap({}, READ_ONLY_STATE))
         print(f" reasoning_node executed successfully")
         print(f"Next action: {result.get('next_action', 'None')}")
         print(f"Current query: {result.get('current_query', 'None')}")
@@ -83,62 +102,53 @@ def test_reasoning_node():
         
     except Exception as e:
         print(f" Error in first call: {e}")
-        import traceback
         traceback.print_exc()
         return
     
-    # Test 2: Second call to reasoning_node (with message history)
-    print("\n=== Test 2: Second Call to reasoning_node (With History) ===")
-    try:
-        # Add the previous result to the state
-        state.update(first_result)
-        
-        # Update the state to simulate what happens after an action
-        state["search_results"]["tasks"] = state["search_results"]["tasks"][:1]  # Reduce tasks
-        
-        result = reasoning_node(state)
-        print(f" Second reasoning_node call executed successfully")
-        print(f"Next action: {result.get('next_action', 'None')}")
-        print(f"Current query: {result.get('current_query', 'None')}")
-        print(f"Error: {result.get('error', 'None')}")
-        
-    except Exception as e:
-        print(f" Error in second call: {e}")
-        import traceback
-        traceback.print_exc()
+    # Tests 2-4 only read the first result, so they run concurrently and report in order
+    search_results = first_result["search_results"]
+    follow_up_tests = [
+        (
+            "Test 2: Second Call to reasoning_node (With History)",
+            # Build on the previous result, simulating what happens after an action
+            ChainMap({
+                "search_results": dict(search_results, tasks=search_results["tasks"][:1])  # Reduce tasks
+            }, first_result),
+            " Second reasoning_node call executed successfully",
+            ("next_action", "current_query", "error"),
+            "second call"
+        ),
+        (
+            "Test 3: Test with Error State",
+            ChainMap({"error": "Test error"}, first_result),
+            " Error state handled successfully",
+            ("next_action", "error"),
+            "error state test"
+        ),
+        (
+            "Test 4: Test with Empty Search Results",
+            ChainMap({
+                "search_results": {"success": True, "tasks": []},
+                "routine_results": {"success": True, "routines": []}
+            }, first_result),
+            " Empty results handled successfully",
+            ("next_action", "current_query"),
+            "empty results test"
+        ),
+    ]
     
-    # Test 3: Test with error state
-    print("\n=== Test 3: Test with Error State ===")
-    try:
-        error_state = state.copy()
-        error_state["error"] = "Test error"
-        
-        result = reasoning_node(error_state)
-        print(f" Error state handled successfully")
-        print(f"Next action: {result.get('next_action', 'None')}")
-        print(f"Error: {result.get('error', 'None')}")
-        
-    except Exception as e:
-        print(f" Error in error state test: {e}")
-        import traceback
-        traceback.print_exc()
+    with ThreadPoolExecutor(max_workers=len(follow_up_tests)) as executor:
+        outcomes = list(executor.map(run_reasoning, [test[1] for test in follow_up_tests]))
     
-    # Test 4: Test with empty search results
-    print("\n=== Test 4: Test with Empty Search Results ===")
-    try:
-        empty_state = state.copy()
-        empty_state["search_results"] = {"success": True, "tasks": []}
-        empty_state["routine_results"] = {"success": True, "routines": []}
-        
-        result = reasoning_node(empty_state)
-        print(f" Empty results handled successfully")
-        print(f"Next action: {result.get('next_action', 'None')}")
-        print(f"Current query: {result.get('current_query', 'None')}")
-        
-    except Exception as e:
-        print(f" Error in empty results test: {e}")
-        import traceback
-        traceback.print_exc()
+    for (title, _, success_message, fields, label), (result, error, trace) in zip(follow_up_tests, outcomes):
+        print(f"\n=== {title} ===")
+        if error is not None:
+            print(f" Error in {label}: {error}")
+            print(trace, end="", file=sys.stderr)
+            continue
+        print(success_message)
+        for field in fields:
+            print(f"{FIELD_LABELS[field]}: {result.get(field, 'None')}")
 
 if __name__ == "__main__":
     test_reasoning_node() 
\ No newline at end of file
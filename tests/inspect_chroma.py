@@ -1,53 +1,55 @@
 import os
-from src.tools.rag_engine import RAGEngine
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from _fixtures import get_rag_engine
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def inspect_chroma_collections():
-    print("Initializing RAGEngine to connect to ChromaDB...")
-    rag_engine = RAGEngine()
-    print("RAGEngine initialized.")
-
-    print("\n--- Inspecting notion_tasks collection ---")
+def inspect_collection(collection, collection_name, kind):
+    """Summarize one collection; returns the report lines so collections can be inspected concurrently."""
+    lines = [f"\n--- Inspecting {collection_name} collection ---"]
     try:
-        tasks_count = rag_engine.tasks_collection.count()
-        print(f"Total tasks in collection: {tasks_count}")
-
-        if tasks_count > 0:
-            print("\nPeeking at first 5 tasks:")
-            # Peek returns a dictionary with 'ids', 'embeddings', 'metadatas', 'documents'
-            peek_results = rag_engine.tasks_collection.peek(limit=5)
+        # Skip the embeddings; a short page also gives the total without a count() round trip
+        peek_results = collection.get(limit=5, include=["metadatas", "documents"])
+        count = len(peek_results['ids'])
+        if count == 5:
+            count = collection.count()
+        lines.append(f"Total {kind} in collection: {count}")
+
+        if count > 0:
+            lines.append(f"\nPeeking at first 5 {kind}:")
             for i in range(len(peek_results['ids'])):
-                print(f"  ID: {peek_results['ids'][i]}")
-                print(f"  Document: {peek_results['documents'][i][:100]}...") # Show first 100 chars
-                print(f"  Metadata: {peek_results['metadatas'][i]}")
-                print("-" * 20)
+                lines.append(f"  ID: {peek_results['ids'][i]}")
+                lines.append(f"  Document: {peek_results['documents'][i][:100]}...") # Show first 100 chars
+                lines.append(f"  Metadata: {peek_results['metadatas'][i]}")
+                lines.append("-" * 20)
         else:
-            print("No tasks found in the collection.")
+            lines.append(f"No {kind} found in the collection.")
 
     except Exception as e:
-        print(f"Error inspecting tasks collection: {e}")
+        lines.append(f"Error inspecting {kind} collection: {e}")
+    return lines
 
-    print("\n--- Inspecting notion_routines collection ---")
-    try:
-        routines_count = rag_engine.routines_collection.count()
-        print(f"Total routines in collection: {routines_count}")
+def inspect_chroma_collections():
+    print("Initializing RAGEngine to connect to ChromaDB...")
+    rag_engine = get_rag_engine()
+    print("RAGEngine initialized.")
 
-        if routines_count > 0:
-            print("\nPeeking at first 5 routines:")
-            peek_results = rag_engine.routines_collection.peek(limit=5)
-            for i in range(len(peek_results['ids'])):
-                print(f"  ID: {peek_results['ids'][i]}")
-                print(f"  Document: {peek_results['documents'][i][:100]}...") # Show first 100 chars
-                print(f"  Metadata: {peek_results['metadatas'][i]}")
-                print("-" * 20)
-        else:
-            print("No routines found in the collection.")
+    targets = [
+        (rag_engine.tasks_collection, "notion_tasks", "tasks"),
+        (rag_engine.routines_collection, "notion_routines", "routines"),
+    ]
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        reports = list(executor.map(lambda target: inspect_collection(*target), targets))
 
-    except Exception as e:
-        print(f"Error inspecting routines collection: {e}")
+    for lines in reports:
+        for line in lines:
+            print(line)
 
 if __name__ == "__main__":
     inspect_chroma_collections()
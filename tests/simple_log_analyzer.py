@@ -7,58 +7,112 @@ Analyzes agent execution logs to provide insights into performance and errors.
 
 import re
 import os
+import shutil
+import subprocess
 from collections import Counter
 from datetime import datetime
 
-def analyze_agent_logs(log_file="agent.log"):
-    """Analyze agent logs and generate a report."""
-    
-    if not os.path.exists(log_file):
-        print(f"Log file not found: {log_file}")
-        return
-    
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            logs = f.readlines()
-    except UnicodeDecodeError:
-        with open(log_file, 'r', encoding='latin-1') as f:
-            logs = f.readlines()
-    
-    # Initialize counters
+# The log is scanned as bytes: every marker is ASCII, so no decode pass is needed
+ACTION_RE = re.compile(rb'Action: Executing (\w+)')
+
+# Error message marker -> error category
+ERROR_MAP = {
+    b'LLM response has no candidates': 'llm_no_candidates',
+    b'Recursion limit': 'recursion_limit',
+    b'coroutine object': 'async_error',
+    b'JSONDecodeError': 'json_parse_error'
+}
+ERROR_RE = re.compile(b'|'.join(re.escape(marker) for marker in ERROR_MAP))
+
+# Logs at least this large are prefiltered by ripgrep/grep before the Python pass
+EXTERNAL_SCAN_MIN_BYTES = 500 * 1024 * 1024
+
+# Lines without one of these markers never affect the report
+LINE_MARKERS = (b'ERROR', b'Starting LangGraph execution', b'Action: Executing')
+
+def tally_lines(lines):
+    """Count lines, executions, errors, error types and tool calls over an iterable of byte lines."""
+    line_count = 0
     execution_count = 0
     error_count = 0
     tool_usage = Counter()
     error_types = Counter()
     
-    # Analyze logs
-    for line in logs:
-        line = line.strip()
-        
-        # Count executions
-        if 'Starting LangGraph execution' in line:
-            execution_count += 1
+    for line in lines:
+        line_count += 1
         
         # Count errors
-        if 'ERROR' in line:
+        if b'ERROR' in line:
             error_count += 1
             
-            # Categorize errors
-            if 'LLM response has no candidates' in line:
-                error_types['llm_no_candidates'] += 1
-            elif 'Recursion limit' in line:
-                error_types['recursion_limit'] += 1
-            elif 'coroutine object' in line:
-                error_types['async_error'] += 1
-            elif 'JSONDecodeError' in line:
-                error_types['json_parse_error'] += 1
-            else:
-                error_types['other'] += 1
+            # Categorize errors by the first marker on the line
+            match = ERROR_RE.search(line)
+            error_types[ERROR_MAP[match.group()] if match else 'other'] += 1
+        
+        # Count executions
+        if b'Starting LangGraph execution' in line:
+            execution_count += 1
         
         # Count tool usage
-        if 'Action: Executing' in line:
-            match = re.search(r'Action: Executing (\w+)', line)
+        if b'Action: Executing' in line:
+            match = ACTION_RE.search(line)
             if match:
-                tool_usage[match.group(1)] += 1
+                tool_usage[match.group(1).decode('ascii')] += 1
+    
+    return line_count, execution_count, error_count, tool_usage, error_types
+
+def external_grep_command():
+    """Fixed-string line filter command (ripgrep preferred, grep otherwise), or None if neither exists."""
+    if shutil.which('rg'):
+        return ['rg', '--no-config', '--no-filename', '--no-line-number', '--color', 'never', '-a', '-F']
+    if shutil.which('grep'):
+        return ['grep', '-h', '-a', '-F']
+    return None
+
+def grep_args(command, log_file, patterns):
+    """Full argument list matching any of the fixed-string patterns in log_file."""
+    return command + [arg for pattern in patterns for arg in ('-e', pattern)] + [log_file]
+
+def check_grep_status(returncode, args):
+    """Exit status 1 only means nothing matched; anything higher is a real failure."""
+    if returncode > 1:
+        raise subprocess.CalledProcessError(returncode, args)
+
+def tally_with_grep(command, log_file):
+    """Let the external tool do the full-file passes and tally only the marker lines in Python."""
+    args = grep_args(command, log_file, [marker.decode('ascii') for marker in LINE_MARKERS])
+    with subprocess.Popen(args, stdout=subprocess.PIPE) as proc:
+        _, execution_count, error_count, tool_usage, error_types = tally_lines(proc.stdout)
+    check_grep_status(proc.returncode, args)
+    
+    # An empty pattern matches every line
+    args = grep_args(command + ['-c'], log_file, [''])
+    result = subprocess.run(args, stdout=subprocess.PIPE)
+    check_grep_status(result.returncode, args)
+    line_count = int(result.stdout or 0)
+    return line_count, execution_count, error_count, tool_usage, error_types
+
+def analyze_agent_logs(log_file="agent.log"):
+    """Analyze agent logs and generate a report."""
+    
+    if not os.path.exists(log_file):
+        print(f"Log file not found: {log_file}")
+        return
+    
+    counts = None
+    command = external_grep_command()
+    if command and os.path.getsize(log_file) >= EXTERNAL_SCAN_MIN_BYTES:
+        try:
+            counts = tally_with_grep(command, log_file)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            print(f"External scan with {command[0]} failed, falling back to Python: {e}")
+    
+    if counts is None:
+        # Analyze logs, streaming so memory stays flat on large files
+        with open(log_file, 'rb') as f:
+            counts = tally_lines(f)
+    
+    line_count, execution_count, error_count, tool_usage, error_types = counts
     
     # Generate report
     print("=" * 50)
@@ -66,7 +120,7 @@ def analyze_agent_logs(log_file="agent.log"):
     print("=" * 50)
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Log file: {log_file}")
-    print(f"Total log lines: {len(logs)}")
+    print(f"Total log lines: {line_count}")
     print()
     
     print("EXECUTION STATISTICS")
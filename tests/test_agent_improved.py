@@ -10,7 +10,8 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.agent import run_agent, graph
-from src.tools.rag_engine import RAGEngine
+from src.json_codec import loads as _jloads
+from _fixtures import capture_output, get_rag_engine
 
 async def test_improved_agent():
     """Test the improved agent with JSON output and LangGraph."""
@@ -40,8 +41,7 @@ async def test_improved_agent():
         '''
         
         # Test JSON parsing
-        import json
-        parsed = json.loads(test_response.strip())
+        parsed = _jloads(test_response)
         print(f"   Parsed reasoning: {parsed['reasoning']}")
         print(f"   Parsed tool: {parsed['action']['tool']}")
         print(f"   Parsed parameters: {parsed['action']['parameters']}")
@@ -51,7 +51,7 @@ async def test_improved_agent():
         print("\n3. Testing Agent Execution with LangGraph...")
         
         # Sync RAG data first
-        rag_engine = RAGEngine()
+        rag_engine = get_rag_engine()
         print("   Syncing RAG data...")
         await rag_engine.sync_notion_data()
         print("    RAG data synced")
@@ -119,7 +119,12 @@ async def test_json_output_format():
 
 if __name__ == "__main__":
     async def main():
-        await test_json_output_format()
-        await test_improved_agent()
+        # Each test prints into its own buffer; the reports are shown in the order given
+        outputs = await asyncio.gather(
+            capture_output(test_json_output_format()),
+            capture_output(test_improved_agent())
+        )
+        for output in outputs:
+            print(output, end="")
     
     asyncio.run(main()) 
\ No newline at end of file
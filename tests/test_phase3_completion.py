@@ -11,8 +11,10 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.agent import run_agent, graph
-from src.tools.rag_engine import RAGEngine
+from src.json_codec import loads as _jloads
+from _fixtures import buffered_output, get_rag_engine
 
+@buffered_output
 async def test_phase3_completion():
     """Test Phase 3 completion with all improvements."""
     print(" Testing Phase 3 Completion")
@@ -42,8 +44,7 @@ async def test_phase3_completion():
         }
         '''
         
-        import json
-        parsed = json.loads(test_response.strip())
+        parsed = _jloads(test_response.strip())
         print(f"   Parsed tool: {parsed['action']['tool']}")
         print(f"   Parsed parameters: {parsed['action']['parameters']}")
         print("    JSON parsing working correctly")
@@ -51,11 +52,14 @@ async def test_phase3_completion():
         # Test 3: Test agent execution with improved loop detection
         print("\n3. Testing Agent Execution with Improved Loop Detection...")
         
-        # Sync RAG data first
-        rag_engine = RAGEngine()
-        print("   Syncing RAG data...")
-        await rag_engine.sync_notion_data()
-        print("    RAG data synced")
+        # Sync RAG data first, unless a recent run already did
+        rag_engine = get_rag_engine()
+        if rag_engine.is_fresh():
+            print("    RAG data synced recently, skipping sync")
+        else:
+            print("   Syncing RAG data...")
+            await rag_engine.sync_notion_data()
+            print("    RAG data synced")
         
         # Run agent with improved configuration
         print("   Running agent with improved loop detection...")
@@ -98,7 +102,7 @@ async def test_phase3_completion():
         # Test 6: Performance metrics
         print("\n6. Testing Performance Metrics...")
         recent_actions = result.get('recent_actions', [])
-        search_count = sum(1 for action in recent_actions if action == "search_tasks")
+        search_count = recent_actions.count("search_tasks")
         print(f"   Total actions: {len(recent_actions)}")
         print(f"   Search operations: {search_count}")
         print(f"   Loop count: {result.get('loop_count', 0)}")
@@ -126,6 +130,7 @@ async def test_phase3_completion():
         traceback.print_exc()
         return None
 
+@buffered_output
 async def test_error_recovery():
     """Test error recovery mechanisms."""
     print("\n Testing Error Recovery Mechanisms")
@@ -155,6 +160,7 @@ async def test_error_recovery():
     except Exception as e:
         print(f" Error in error recovery test: {str(e)}")
 
+@buffered_output
 async def test_performance_optimization():
     """Test performance optimizations."""
     print("\n Testing Performance Optimizations")
@@ -181,10 +187,15 @@ async def test_performance_optimization():
     except Exception as e:
         print(f" Error in performance test: {str(e)}")
 
+async def main():
+    """Run the phase 3 checks together; a crash in one cancels the others.
+
+    Each check's report is buffered separately and written whole when it finishes.
+    """
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(test_performance_optimization())
+        tg.create_task(test_error_recovery())
+        tg.create_task(test_phase3_completion())
+
 if __name__ == "__main__":
-    async def main():
-        await test_performance_optimization()
-        await test_error_recovery()
-        await test_phase3_completion()
-    
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
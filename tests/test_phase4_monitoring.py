@@ -8,7 +8,6 @@ analytics dashboard, and cost optimization features.
 import asyncio
 import os
 import sys
-import time
 from datetime import datetime, timedelta
 
 # Add the project root to Python path
@@ -19,7 +18,9 @@ from src.monitoring.metrics_collector import get_metrics_collector, MetricsColle
 from src.monitoring.feedback_system import get_feedback_system, FeedbackSystem, FeedbackType, FeedbackRating
 from src.monitoring.analytics_dashboard import get_analytics_dashboard, AnalyticsDashboard
 from src.monitoring.cost_optimizer import get_cost_optimizer, CostOptimizer
+from _fixtures import buffered_output
 
+@buffered_output
 async def test_phase4_monitoring():
     """Test Phase 4 monitoring and analytics features."""
     print(" Testing Phase 4 Monitoring & Analytics")
@@ -43,10 +44,8 @@ async def test_phase4_monitoring():
         print("\n2. Testing Metrics Collector...")
         metrics_collector = get_metrics_collector()
         
-        # Record some test metrics
-        start_time = time.time()
-        time.sleep(0.1)  # Simulate operation
-        duration_ms = (time.time() - start_time) * 1000
+        # Record some test metrics with a fixed simulated duration
+        duration_ms = 100.0
         
         metrics_collector.record_operation(
             operation_type="test_operation",
@@ -63,6 +62,14 @@ async def test_phase4_monitoring():
             success=True
         )
         
+        # Record a burst of synthetic operations through the bulk path
+        bulk_rows = [
+            ("bulk_test_operation", float(i % 50), 100 + i % 10, "gemini-pro", i % 20 != 0)
+            for i in range(1000)
+        ]
+        metrics_collector.record_operations_bulk(bulk_rows)
+        print(f"   Bulk-recorded operations: {len(bulk_rows)}")
+        
         # Get performance summary
         performance_summary = metrics_collector.get_performance_summary(hours=1)
         print(f"   Total operations: {performance_summary.get('total_operations', 0)}")
@@ -209,6 +216,10 @@ async def test_phase4_monitoring():
         
         print("    Performance optimization working")
         
+        # Wait for queued LangSmith runs to finish exporting
+        if not tracer.flush(timeout=5):
+            print("    LangSmith export still pending after 5s")
+        
         print("\n" + "=" * 60)
         print(" Phase 4 Monitoring Test Completed Successfully!")
         
@@ -239,6 +250,7 @@ async def test_phase4_monitoring():
         traceback.print_exc()
         return {"success": False, "error": str(e)}
 
+@buffered_output
 async def test_monitoring_integration():
     """Test integration of monitoring systems with the agent."""
     print("\n Testing Monitoring Integration")
@@ -276,8 +288,9 @@ async def test_monitoring_integration():
         return False
 
 if __name__ == "__main__":
-    async def main():
-        await test_monitoring_integration()
-        await test_phase4_monitoring()
-    
-    asyncio.run(main()) 
\ No newline at end of file
+    # One loop for the whole run; each test's report is buffered and written whole when it finishes
+    with asyncio.Runner() as runner:
+        runner.run(asyncio.gather(
+            test_monitoring_integration(),
+            test_phase4_monitoring()
+        )) 
\ No newline at end of file
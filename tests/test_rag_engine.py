@@ -9,8 +9,7 @@ from datetime import datetime
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.tools.rag_engine import RAGEngine
-from src.tools.notion_connector import NotionConnector
+from _fixtures import get_rag_engine
 
 async def test_rag_engine():
     """Test RAG engine functionality."""
@@ -23,35 +22,29 @@ async def test_rag_engine():
     try:
         # Initialize RAG engine
         print("1. Initializing RAG Engine...")
-        rag_engine = RAGEngine()
+        rag_engine = get_rag_engine()
         print("    RAG Engine initialized successfully")
         
-        # Test Notion connector directly
+        # Test Notion connector directly; reuse the engine's so both share one client
         print("\n2. Testing Notion Connector...")
-        notion = NotionConnector()
+        notion = rag_engine.notion
         
-        # Test getting tasks
-        print("   Testing task retrieval...")
-        tasks = await notion.get_tasks()
+        # Fetch tasks and routines concurrently
+        print("   Testing task and routine retrieval...")
+        tasks, routines = await asyncio.gather(notion.get_tasks(), notion.get_routines())
         print(f"    Found {len(tasks)} tasks")
         if tasks:
             print(f"   Sample task: {tasks[0].title} (Status: {tasks[0].status})")
         
-        # Test getting routines
-        print("   Testing routine retrieval...")
-        routines = await notion.get_routines()
         print(f"    Found {len(routines)} routines")
         if routines:
             print(f"   Sample routine: {routines[0].task} (Category: {routines[0].category})")
         
-        # Test RAG sync
+        # Test RAG sync; tasks and routines live in separate collections
         print("\n3. Testing RAG Sync...")
-        print("   Syncing tasks...")
-        await rag_engine._sync_tasks()
+        print("   Syncing tasks and routines...")
+        await asyncio.gather(rag_engine._sync_tasks(), rag_engine._sync_routines())
         print("    Tasks synced successfully")
-        
-        print("   Syncing routines...")
-        await rag_engine._sync_routines()
         print("    Routines synced successfully")
         
         # Test search functionality
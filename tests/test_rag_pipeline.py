@@ -1,18 +1,14 @@
+import asyncio
+import hashlib
+import itertools
 import os
-import shutil
-import tempfile
 
+import numpy as np
 import pytest
 from datetime import datetime, timedelta
 
-# Environment setup: use a temporary directory for Chroma DB to isolate tests
-TMP_DIR = tempfile.mkdtemp()
-os.environ["CHROMA_DB_PATH"] = os.path.join(TMP_DIR, "chroma")
-# Ensure sync state file also goes to tmp
-os.environ["RAG_SYNC_STATE_PATH"] = os.path.join(TMP_DIR, "rag_sync_state.json")
-
-from src.tools.rag_engine import RAGEngine  # noqa: E402
-from src.schema.notion_schemas import NotionTaskSchema  # noqa: E402
+from src.tools.rag_engine import RAGEngine
+from src.schema.notion_schemas import NotionTaskSchema
 
 
 class _FakeNotionConnector:
@@ -21,27 +17,59 @@ class _FakeNotionConnector:
     def __init__(self, tasks):
         self._tasks = tasks
 
-    def get_tasks(self):
+    async def get_tasks(self):
         return self._tasks
 
-    def get_routines(self):
+    async def get_routines(self):
         return []
 
 
-@pytest.fixture(autouse=True)
-def cleanup_tmpdir():
-    """Clean up tmpdir after tests."""
-    yield
-    shutil.rmtree(TMP_DIR, ignore_errors=True)
+# Fixed, strictly increasing clock for task edit times; keeps runs reproducible
+_NOW = datetime(2024, 1, 1)
+_TICK = itertools.count()
+
+
+def _now() -> datetime:
+    return _NOW + timedelta(seconds=next(_TICK))
+
+
+def _fake_embed_batch(texts):
+    """Deterministic hash-based embeddings, so syncs never call the embedding API."""
+    return [
+        (np.frombuffer(hashlib.blake2b(text.encode("utf-8"), digest_size=48).digest(), dtype=np.uint8)
+         .astype(np.float32) / 255.0).tolist()
+        for text in texts
+    ]
+
+
+@pytest.fixture(scope="session")
+def chroma_root(tmp_path_factory):
+    """One temporary Chroma DB and sync state file for the whole session, isolated from real data."""
+    root = tmp_path_factory.mktemp("rag")
+    os.environ["CHROMA_DB_PATH"] = str(root / "chroma")
+    os.environ["RAG_SYNC_STATE_PATH"] = str(root / "rag_sync_state.json")
+    yield root
 
 
-def _make_task(task_id: str, edited_dt: datetime, long_notes_words: int = 0):
+@pytest.fixture
+def engine(chroma_root):
+    """RAGEngine on the session DB; its collections and sync state are emptied after each test."""
+    engine = RAGEngine()
+    yield engine
+    for collection in (engine.tasks_collection, engine.routines_collection):
+        ids = collection.get(include=[])["ids"]
+        if ids:
+            collection.delete(ids=ids)
+    (chroma_root / "rag_sync_state.json").unlink(missing_ok=True)
+
+
+def _make_task(task_id: str, edited_dt: datetime, long_notes_words: int = 0, status: str = "To Do"):
     """Helper to generate NotionTaskSchema with optional long notes."""
     notes = "word " * long_notes_words if long_notes_words else "Sample notes"
     return NotionTaskSchema(
         id=task_id,
         title=f"Task {task_id}",
-        status="To Do",
+        status=status,
         priority="Medium",
         due_date=None,
         scheduled_time=None,
@@ -53,9 +81,8 @@ def _make_task(task_id: str, edited_dt: datetime, long_notes_words: int = 0):
     )
 
 
-def test_chunking_logic():
+def test_chunking_logic(engine):
     """Verify that _chunk_text splits long text into overlapping chunks."""
-    engine = RAGEngine()
     long_text = "word " * 1000  # 1000 words
     chunks = engine._chunk_text(long_text.strip())
 
@@ -69,35 +96,40 @@ def test_chunking_logic():
     assert all(len(chunk.split()) <= 300 for chunk in chunks)
 
 
-def test_incremental_sync():
+def test_incremental_sync(engine):
     """Ensure that only modified tasks are re-embedded on subsequent syncs."""
-    base_time = datetime.utcnow()
-    task1 = _make_task("task1", base_time - timedelta(days=1), long_notes_words=600)
+    task1 = _make_task("task1", _now(), long_notes_words=600)
     tasks_round1 = [task1]
 
-    # Inject fake connector before instantiating engine
-    RAGEngine.NotionConnector = None  # type: ignore  # prevent accidental use
-
-    engine = RAGEngine()
-    # Monkeypatch the notion attribute directly
+    # Monkeypatch the notion attribute and the embedder directly
     engine.notion = _FakeNotionConnector(tasks_round1)
+    engine._embed_batch = _fake_embed_batch
 
     # First sync – should embed task1 chunks
-    engine.sync_notion_data()
+    asyncio.run(engine.sync_notion_data())
     res1 = engine.tasks_collection.get(where={"parent_id": "task1"})
     chunk_count_round1 = len(res1["ids"]) if res1["ids"] else 0
     assert chunk_count_round1 > 0, "Expected chunks for task1 after first sync"
 
     # Second sync with no edits – nothing should change
-    engine.sync_notion_data()
+    asyncio.run(engine.sync_notion_data())
     res2 = engine.tasks_collection.get(where={"parent_id": "task1"})
     assert len(res2["ids"]) == chunk_count_round1
 
-    # Third sync – task1 edited, should delete & re-add chunks (ids will differ)
-    task1_updated = _make_task("task1", datetime.utcnow(), long_notes_words=600)
-    engine.notion = _FakeNotionConnector([task1_updated])
-    engine.sync_notion_data()
+    # Third sync – only the timestamp moved, so the content hash matches and nothing is re-embedded
+    touched_dt = _now()
+    task1_touched = _make_task("task1", touched_dt, long_notes_words=600)
+    engine.notion = _FakeNotionConnector([task1_touched])
+    stats3 = asyncio.run(engine.sync_notion_data())
+    assert stats3["task_chunks_created"] == 0
     res3 = engine.tasks_collection.get(where={"parent_id": "task1"})
-    assert len(res3["ids"]) == chunk_count_round1  # same number of chunks
-    # ids should have new suffix index starting from 0 again but they might match, so check documents differ
-    assert res3["documents"][0][0] == res1["documents"][0][0]  # content same 
\ No newline at end of file
+    assert len(res3["ids"]) == chunk_count_round1
+
+    # Fourth sync – content edited without bumping the timestamp, so task1 is re-embedded
+    task1_edited = _make_task("task1", touched_dt, long_notes_words=600, status="Done")
+    engine.notion = _FakeNotionConnector([task1_edited])
+    stats4 = asyncio.run(engine.sync_notion_data())
+    assert stats4["task_chunks_created"] == chunk_count_round1
+    res4 = engine.tasks_collection.get(where={"parent_id": "task1"})
+    assert len(res4["ids"]) == chunk_count_round1  # same number of chunks
+    assert any("Status: Done" in doc for doc in res4["documents"])
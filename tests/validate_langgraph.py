@@ -6,37 +6,101 @@ Validates the current LangGraph implementation for common issues and best practi
 
 import sys
 import os
+import io
 import importlib
 import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Literal
 from datetime import datetime
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+@lru_cache(maxsize=None)
+def _cached_sig(fn):
+    """Signature of a function, introspected once; a precomputed __signature__ is used as is."""
+    sig = getattr(fn, "__signature__", None)
+    if isinstance(sig, inspect.Signature):
+        return sig
+    return inspect.signature(fn)
+
+def _is_state_only(fn):
+    """Whether a function takes exactly one parameter, named `state`."""
+    params = _cached_sig(fn).parameters
+    return len(params) == 1 and next(iter(params)) == 'state'
+
+def _code_identifiers(code):
+    """Names and string constants used by a code object and the code nested in it."""
+    found = set(code.co_names)
+    pending = list(code.co_consts)
+    while pending:
+        const = pending.pop()
+        if isinstance(const, str):
+            found.add(const)
+        elif isinstance(const, (tuple, frozenset)):
+            pending.extend(const)
+        elif inspect.iscode(const):
+            found.update(const.co_names)
+            pending.extend(const.co_consts)
+    return found
+
+@lru_cache(maxsize=None)
+def cached_import_module(module_path):
+    """Return a module, going through importlib only if it is not already fully loaded."""
+    modules = sys.modules
+    if module_path not in modules or (
+        # Module is not fully initialized
+        getattr(modules[module_path], "__spec__", None) is not None
+        and getattr(modules[module_path].__spec__, "_initializing", False) is True
+    ):
+        importlib.import_module(module_path)
+    return modules[module_path]
+
+# What the agent module must provide
+_REQUIRED_FIELDS = frozenset({'goal', 'context', 'messages', 'next_action', 'tool_calls', 'tool_results', 'error'})
+_REQUIRED_NODES = frozenset({'perception', 'reasoning', 'action', 'save_state'})
+_REQUIRED_TOOLS = frozenset({'search_tasks', 'update_task', 'create_task', 'send_notification', 'get_routines'})
+_EXPECTED_SHOULD_CONTINUE_RETURN = Literal["continue", "end"]
+
+@lru_cache(maxsize=1)
+def _try_import_agent():
+    """Import src.agent once for every validator, returning (module, None) or (None, error).
+
+    A failed import is remembered too, so a broken agent module is not re-executed by each validator.
+    """
+    try:
+        import src.agent
+        return src.agent, None
+    except Exception as e:
+        return None, e
+
 def validate_imports():
     """Validate all required LangGraph imports."""
     print(" Validating LangGraph imports...")
     
     required_imports = [
-        ("langgraph.graph", ["StateGraph", "END"]),
-        ("langgraph.checkpoint.memory", ["MemorySaver"]),
-        ("langgraph.graph.message", ["add_messages"]),
+        ("langgraph.graph", frozenset({"StateGraph", "END"})),
+        ("langgraph.checkpoint.memory", frozenset({"MemorySaver"})),
+        ("langgraph.graph.message", frozenset({"add_messages"})),
     ]
     
     all_valid = True
     for module, items in required_imports:
         try:
-            mod = importlib.import_module(module)
-            for item in items:
-                if hasattr(mod, item):
-                    print(f"   {module}.{item}")
-                else:
-                    print(f"   {module}.{item} - NOT FOUND")
-                    all_valid = False
+            mod = cached_import_module(module)
         except ImportError as e:
             print(f"   {module} - Import failed: {e}")
             all_valid = False
+            continue
+        
+        missing = items - vars(mod).keys()
+        for item in sorted(items - missing):
+            print(f"   {module}.{item}")
+        for item in sorted(missing):
+            print(f"   {module}.{item} - NOT FOUND")
+        all_valid = all_valid and not missing
     
     return all_valid
 
@@ -44,8 +108,13 @@ def validate_state_schema():
     """Validate the AgentState schema."""
     print("\n Validating AgentState schema...")
     
+    agent, error = _try_import_agent()
+    if error is not None:
+        print(f"   Could not import AgentState: {error}")
+        return False
+    
     try:
-        from src.agent import AgentState
+        AgentState = agent.AgentState
         
         # Check if it's a TypedDict
         if not hasattr(AgentState, '__annotations__'):
@@ -53,29 +122,17 @@ def validate_state_schema():
             return False
         
         # Check required fields
-        required_fields = {
-            'goal': str,
-            'context': dict,
-            'messages': list,
-            'next_action': Optional[dict],
-            'tool_calls': list,
-            'tool_results': list,
-            'error': Optional[str]
-        }
-        
         annotations = AgentState.__annotations__
-        all_valid = True
+        missing = _REQUIRED_FIELDS - annotations.keys()
         
-        for field, expected_type in required_fields.items():
-            if field in annotations:
-                print(f"   {field}: {annotations[field]}")
-            else:
-                print(f"   Missing field: {field}")
-                all_valid = False
+        for field in sorted(_REQUIRED_FIELDS - missing):
+            print(f"   {field}: {annotations[field]}")
+        for field in sorted(missing):
+            print(f"   Missing field: {field}")
         
-        return all_valid
+        return not missing
         
-    except ImportError as e:
+    except AttributeError as e:
         print(f"   Could not import AgentState: {e}")
         return False
 
@@ -83,38 +140,36 @@ def validate_node_functions():
     """Validate node function signatures and patterns."""
     print("\n Validating node functions...")
     
+    agent, error = _try_import_agent()
+    if error is not None:
+        print(f"   Could not import node functions: {error}")
+        return False
+    
     try:
-        from src.agent import perception_node, reasoning_node, action_node, save_state_node
-        
         node_functions = [
-            ("perception_node", perception_node),
-            ("reasoning_node", reasoning_node),
-            ("action_node", action_node),
-            ("save_state_node", save_state_node),
+            (name, getattr(agent, name))
+            for name in ("perception_node", "reasoning_node", "action_node", "save_state_node")
         ]
         
         all_valid = True
         
         for name, func in node_functions:
             # Check signature
-            sig = inspect.signature(func)
-            params = list(sig.parameters.keys())
-            
-            if len(params) == 1 and params[0] == 'state':
+            if _is_state_only(func):
                 print(f"   {name}: Correct signature")
             else:
                 print(f"   {name}: Incorrect signature - expected 'state' parameter")
                 all_valid = False
             
             # Check return type annotation
-            if sig.return_annotation != inspect.Signature.empty:
+            if _cached_sig(func).return_annotation != inspect.Signature.empty:
                 print(f"   {name}: Has return type annotation")
             else:
                 print(f"    {name}: Missing return type annotation")
         
         return all_valid
         
-    except ImportError as e:
+    except AttributeError as e:
         print(f"   Could not import node functions: {e}")
         return False
 
@@ -122,21 +177,23 @@ def validate_conditional_edges():
     """Validate conditional edge functions."""
     print("\n Validating conditional edge functions...")
     
+    agent, error = _try_import_agent()
+    if error is not None:
+        print(f"   Could not import should_continue: {error}")
+        return False
+    
     try:
-        from src.agent import should_continue
+        should_continue = agent.should_continue
         
         # Check signature
-        sig = inspect.signature(should_continue)
-        params = list(sig.parameters.keys())
-        
-        if len(params) == 1 and params[0] == 'state':
+        if _is_state_only(should_continue):
             print("   should_continue: Correct signature")
         else:
             print("   should_continue: Incorrect signature")
             return False
         
         # Check return type
-        if sig.return_annotation == Literal["continue", "end"]:
+        if _cached_sig(should_continue).return_annotation == _EXPECTED_SHOULD_CONTINUE_RETURN:
             print("   should_continue: Correct return type")
         else:
             print("   should_continue: Incorrect return type - should be Literal['continue', 'end']")
@@ -144,7 +201,7 @@ def validate_conditional_edges():
         
         return True
         
-    except ImportError as e:
+    except AttributeError as e:
         print(f"   Could not import should_continue: {e}")
         return False
 
@@ -152,8 +209,13 @@ def validate_graph_structure():
     """Validate the graph structure."""
     print("\n Validating graph structure...")
     
+    agent, error = _try_import_agent()
+    if error is not None:
+        print(f"   Could not import graph: {error}")
+        return False
+    
     try:
-        from src.agent import graph
+        graph = agent.graph
         
         # Check if graph is compiled
         if hasattr(graph, 'nodes'):
@@ -163,19 +225,16 @@ def validate_graph_structure():
             return False
         
         # Check required nodes
-        required_nodes = ["perception", "reasoning", "action", "save_state"]
-        all_valid = True
+        missing = _REQUIRED_NODES.difference(graph.nodes)
         
-        for node in required_nodes:
-            if node in graph.nodes:
-                print(f"   Node '{node}' exists")
-            else:
-                print(f"   Missing node: '{node}'")
-                all_valid = False
+        for node in sorted(_REQUIRED_NODES - missing):
+            print(f"   Node '{node}' exists")
+        for node in sorted(missing):
+            print(f"   Missing node: '{node}'")
         
-        return all_valid
+        return not missing
         
-    except ImportError as e:
+    except AttributeError as e:
         print(f"   Could not import graph: {e}")
         return False
 
@@ -183,26 +242,28 @@ def validate_tool_mappings():
     """Validate tool mappings."""
     print("\n Validating tool mappings...")
     
+    agent, error = _try_import_agent()
+    if error is not None:
+        print(f"   Could not import TOOLS: {error}")
+        return False
+    
     try:
-        from src.agent import TOOLS
+        TOOLS = agent.TOOLS
         
         if not isinstance(TOOLS, dict):
             print("   TOOLS is not a dictionary")
             return False
         
-        required_tools = ["search_tasks", "update_task", "create_task", "send_notification", "get_routines"]
-        all_valid = True
+        missing = _REQUIRED_TOOLS - TOOLS.keys()
         
-        for tool in required_tools:
-            if tool in TOOLS:
-                print(f"   Tool '{tool}' mapped")
-            else:
-                print(f"   Missing tool mapping: '{tool}'")
-                all_valid = False
+        for tool in sorted(_REQUIRED_TOOLS - missing):
+            print(f"   Tool '{tool}' mapped")
+        for tool in sorted(missing):
+            print(f"   Missing tool mapping: '{tool}'")
         
-        return all_valid
+        return not missing
         
-    except ImportError as e:
+    except AttributeError as e:
         print(f"   Could not import TOOLS: {e}")
         return False
 
@@ -210,16 +271,22 @@ def validate_configuration():
     """Validate configuration patterns."""
     print("\n Validating configuration patterns...")
     
+    agent, error = _try_import_agent()
+    if error is not None:
+        print(f"   Could not import run_agent: {error}")
+        return False
+    
     try:
-        from src.agent import run_agent
+        run_agent = agent.run_agent
         
         # Check if run_agent function exists and has proper config
         if callable(run_agent):
             print("   run_agent function exists")
             
             # Check if it uses proper config pattern
-            source = inspect.getsource(run_agent)
-            if "thread_id" in source and "configurable" in source:
+            # Read the compiled constants instead of parsing the source file
+            identifiers = _code_identifiers(inspect.unwrap(run_agent).__code__)
+            if {"thread_id", "configurable"} <= identifiers:
                 print("   Uses proper configuration pattern")
                 return True
             else:
@@ -229,10 +296,36 @@ def validate_configuration():
             print("   run_agent is not callable")
             return False
             
-    except ImportError as e:
+    except AttributeError as e:
         print(f"   Could not import run_agent: {e}")
         return False
 
+class _ThreadOutput(io.TextIOBase):
+    """stdout stand-in that sends each worker thread's prints to that thread's own buffer."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        return getattr(self._local, "buffer", self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def capture(self, name, validator):
+        """Run one validator, returning (passed, printed report)."""
+        self._local.buffer = io.StringIO()
+        try:
+            try:
+                result = validator()
+            except Exception as e:
+                print(f"   {name}: Validation failed with error: {e}")
+                result = False
+            return result, self._local.buffer.getvalue()
+        finally:
+            del self._local.buffer
+
 def run_validation():
     """Run all validation checks."""
     print(" LangGraph Validation Report")
@@ -250,14 +343,21 @@ def run_validation():
         ("Configuration", validate_configuration),
     ]
     
+    # The validators are independent, so they run concurrently; each one's
+    # report is buffered and printed in the order above
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [(name, executor.submit(output.capture, name, validator)) for name, validator in validations]
+            reports = [(name, future.result()) for name, future in futures]
+    finally:
+        sys.stdout = output._stream
+    
     results = []
-    for name, validator in validations:
-        try:
-            result = validator()
-            results.append((name, result))
-        except Exception as e:
-            print(f"   {name}: Validation failed with error: {e}")
-            results.append((name, False))
+    for name, (result, report) in reports:
+        sys.stdout.write(report)
+        results.append((name, result))
     
     print("\n" + "=" * 50)
     print(" Validation Summary")
@@ -279,6 +379,27 @@ def run_validation():
         print("  Some validations failed. Please review the issues above.")
         return False
 
+def run_generated_checks():
+    """Run the flat checks emitted by scripts/gen_validator.py instead of the introspecting validators."""
+    print(" LangGraph Validation Report (generated checks)")
+    print("=" * 50)
+    
+    try:
+        from _validate_langgraph_generated import CHECK_COUNT, run_checks
+        failed = run_checks()
+    except Exception as e:
+        print(f"   Could not run generated checks: {e}")
+        return False
+    
+    for check in failed:
+        print(f"   Missing {check}")
+    
+    print(f"\nOverall: {CHECK_COUNT - len(failed)}/{CHECK_COUNT} generated checks passed")
+    return not failed
+
 if __name__ == "__main__":
-    success = run_validation()
+    if "--generated" in sys.argv[1:]:
+        success = run_generated_checks()
+    else:
+        success = run_validation()
     sys.exit(0 if success else 1) 
\ No newline at end of file
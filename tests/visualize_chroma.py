@@ -1,84 +1,145 @@
 import os
+import hashlib
+from pathlib import Path
 import numpy as np
-from sklearn.manifold import TSNE
-import matplotlib.pyplot as plt
 from src.tools.rag_engine import RAGEngine
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Dimensions kept by the PCA pass that runs before t-SNE
+PCA_COMPONENTS = 50
+# Embeddings fetched from Chroma per get() call
+FETCH_PAGE_SIZE = 1024
+# t-SNE results, keyed by a digest of their input; the reduction is deterministic (random_state=42)
+TSNE_CACHE_DIR = Path.home() / ".cache" / "nova" / "tsne"
+
 def visualize_chroma_embeddings():
     print("Initializing RAGEngine to connect to ChromaDB...")
     rag_engine = RAGEngine()
     print("RAGEngine initialized.")
 
-    all_embeddings = []
-    all_labels = []
+    # (collection, name, kind)
+    sources = [
+        (rag_engine.tasks_collection, "notion_tasks", "task"),
+        (rag_engine.routines_collection, "notion_routines", "routine"),
+    ]
 
-    # Extract embeddings and labels from tasks collection
-    print("Extracting embeddings from notion_tasks collection...")
-    try:
-        tasks_results = rag_engine.tasks_collection.get(include=['embeddings', 'metadatas'])
-        if tasks_results and 'embeddings' in tasks_results and tasks_results['embeddings'] is not None:
-            if len(tasks_results['embeddings']) > 0: # Explicitly check length
-                all_embeddings.extend(tasks_results['embeddings'])
-                all_labels.extend([f"task: {m.get('title', 'Untitled')}" for m in tasks_results['metadatas']])
-                print(f"Extracted {len(tasks_results['embeddings'])} task embeddings.")
-            else:
-                print("No task embeddings found or collection is empty.")
-        else:
-            print("No 'embeddings' key in tasks_results or it's None.")
-    except Exception as e:
-        print(f"Error extracting task embeddings: {e}")
+    # Size one float32 buffer up front so embeddings are copied straight into it;
+    # tasks fill the first n_tasks rows and routines follow
+    counts = []
+    for collection, name, _ in sources:
+        try:
+            counts.append(collection.count())
+        except Exception as e:
+            print(f"Error counting {name} embeddings: {e}")
+            counts.append(0)
+
+    n_total = sum(counts)
+    if not n_total:
+        print("No embeddings found to visualize.")
+        return
 
-    # Extract embeddings and labels from routines collection
-    print("Extracting embeddings from notion_routines collection...")
     try:
-        routines_results = rag_engine.routines_collection.get(include=['embeddings', 'metadatas'])
-        if routines_results and 'embeddings' in routines_results and routines_results['embeddings'] is not None:
-            if len(routines_results['embeddings']) > 0: # Explicitly check length
-                all_embeddings.extend(routines_results['embeddings'])
-                all_labels.extend([f"routine: {m.get('task', 'Untitled')}" for m in routines_results['metadatas']])
-                print(f"Extracted {len(routines_results['embeddings'])} routine embeddings.")
-            else:
-                print("No routine embeddings found or collection is empty.")
-        else:
-            print("No 'embeddings' key in routines_results or it's None.")
+        collection = sources[0][0] if counts[0] else sources[1][0]
+        dim = len(collection.get(limit=1, include=['embeddings'])['embeddings'][0])
     except Exception as e:
-        print(f"Error extracting routine embeddings: {e}")
+        print(f"Error reading embedding dimension: {e}")
+        return
+
+    embeddings_array = np.empty((n_total, dim), dtype=np.float32)
+    n_tasks = 0
+    filled = 0
 
-    if not all_embeddings:
+    for (collection, name, kind), count in zip(sources, counts):
+        print(f"Extracting embeddings from {name} collection...")
+        if not count:
+            print(f"No {kind} embeddings found or collection is empty.")
+            continue
+        start = filled
+        try:
+            # Page through the collection so only one page of vectors is held as Python objects
+            while filled - start < count:
+                page = collection.get(include=['embeddings'], limit=FETCH_PAGE_SIZE, offset=filled - start)
+                # The collection may have grown since count(); keep only its counted rows
+                n = min(len(page['embeddings']), count - (filled - start))
+                if not n:
+                    break
+                embeddings_array[filled:filled + n] = np.asarray(page['embeddings'][:n], dtype=np.float32)
+                filled += n
+            print(f"Extracted {filled - start} {kind} embeddings.")
+        except Exception as e:
+            print(f"Error extracting {kind} embeddings: {e}")
+        if kind == "task":
+            n_tasks = filled
+
+    if not filled:
         print("No embeddings found to visualize.")
         return
+    embeddings_array = embeddings_array[:filled]
+
+    # Only pay for scikit-learn and matplotlib when there is something to plot
+    from sklearn.decomposition import PCA
+    from sklearn.manifold import TSNE
+    import matplotlib
+    matplotlib.use("Agg")  # The plot is only saved to a file, so skip GUI backend setup
+    import matplotlib.pyplot as plt
+
+    # openTSNE's FFT-accelerated gradients scale better than scikit-learn's Barnes-Hut
+    try:
+        from openTSNE import TSNE as OpenTSNE
+        OPENTSNE_AVAILABLE = True
+    except ImportError:
+        OPENTSNE_AVAILABLE = False
 
-    # Convert to numpy array
-    embeddings_array = np.array(all_embeddings)
     print(f"Total embeddings for visualization: {embeddings_array.shape[0]}")
 
-    # Apply t-SNE for dimensionality reduction
-    print("Applying t-SNE for dimensionality reduction (this may take a while for large datasets)...")
     # Ensure perplexity is less than n_samples
     perplexity_val = min(30, embeddings_array.shape[0] - 1)
     if perplexity_val <= 0:
         print("Not enough samples for t-SNE with perplexity. Skipping t-SNE.")
         return
 
-    tsne = TSNE(n_components=2, random_state=42, perplexity=perplexity_val)
-    reduced_embeddings = tsne.fit_transform(embeddings_array)
+    # Reuse the result of an earlier run on the same embeddings and settings
+    digest = hashlib.blake2b(embeddings_array.tobytes(), digest_size=16)
+    digest.update(f"{embeddings_array.shape}|{perplexity_val}|{PCA_COMPONENTS}|{OPENTSNE_AVAILABLE}".encode("utf-8"))
+    cache_path = TSNE_CACHE_DIR / f"tsne_{digest.hexdigest()}.npy"
+    if cache_path.exists():
+        reduced_embeddings = np.load(cache_path)
+        print(f"Loaded cached t-SNE result from {cache_path}")
+    else:
+        # Apply t-SNE for dimensionality reduction
+        print("Applying t-SNE for dimensionality reduction (this may take a while for large datasets)...")
+
+        # PCA down to 50 dimensions first; t-SNE then works on a much smaller matrix
+        n_components = min(PCA_COMPONENTS, *embeddings_array.shape)
+        if n_components < embeddings_array.shape[1]:
+            embeddings_array = PCA(n_components=n_components, random_state=42).fit_transform(embeddings_array)
+
+        if OPENTSNE_AVAILABLE:
+            tsne = OpenTSNE(n_components=2, perplexity=perplexity_val, n_jobs=-1,
+                            negative_gradient_method="fft", random_state=42)
+            reduced_embeddings = np.asarray(tsne.fit(embeddings_array))
+        else:
+            tsne = TSNE(n_components=2, random_state=42, perplexity=perplexity_val, init="pca", n_jobs=-1)
+            reduced_embeddings = tsne.fit_transform(embeddings_array)
+
+        try:
+            TSNE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.save(cache_path, reduced_embeddings)
+        except OSError as e:
+            print(f"Could not cache t-SNE result: {e}")
     print("t-SNE complete.")
 
     # Plotting
-    plt.figure(figsize=(12, 10))
+    fig = plt.figure(figsize=(12, 10))
     
     # Separate task and routine points for coloring
-    task_indices = [i for i, label in enumerate(all_labels) if label.startswith("task:")]
-    routine_indices = [i for i, label in enumerate(all_labels) if label.startswith("routine:")]
-
-    if task_indices:
-        plt.scatter(reduced_embeddings[task_indices, 0], reduced_embeddings[task_indices, 1], label='Tasks', alpha=0.7, s=50)
-    if routine_indices:
-        plt.scatter(reduced_embeddings[routine_indices, 0], reduced_embeddings[routine_indices, 1], label='Routines', alpha=0.7, s=50)
+    if n_tasks:
+        plt.scatter(reduced_embeddings[:n_tasks, 0], reduced_embeddings[:n_tasks, 1], label='Tasks', alpha=0.7, s=50)
+    if n_tasks < filled:
+        plt.scatter(reduced_embeddings[n_tasks:, 0], reduced_embeddings[n_tasks:, 1], label='Routines', alpha=0.7, s=50)
 
     plt.title('ChromaDB Embeddings Visualization (t-SNE)')
     plt.xlabel('t-SNE Dimension 1')
@@ -89,7 +150,9 @@ def visualize_chroma_embeddings():
     
     # Save the plot to a file
     plot_path = r"C:\Projects\agent_notion\chroma_embeddings_tsne.png"
-    plt.savefig(plot_path)
+    # A 72 dpi preview with light PNG compression is enough for a scatter plot and much quicker to write
+    fig.savefig(plot_path, dpi=72, bbox_inches='tight', pil_kwargs={'compress_level': 1})
+    plt.close(fig)
     print(f"Visualization saved to {plot_path}")
     # plt.show() # Commented out for non-interactive environments
 